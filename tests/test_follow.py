@@ -80,6 +80,14 @@ class TestFollow:
         assert response.status_code != 404, f'Страница `{str_url}` не найдена, проверьте этот адрес в *urls.py*'
         return response
 
+    def post_url(self, client, url, str_url):
+        try:
+            response = client.post(f'{url}/')
+        except Exception as e:
+            assert False, f'''Страница `{str_url}` работает неправильно. Ошибка: `{e}`'''
+        assert response.status_code != 404, f'Страница `{str_url}` не найдена, проверьте этот адрес в *urls.py*'
+        return response
+
     @pytest.mark.django_db(transaction=True)
     def test_follow_not_auth(self, client, user):
         response = self.check_url(client, '/follow', '/follow/')
@@ -109,15 +117,17 @@ class TestFollow:
             '`related_name="follower"'
         )
         assert user.follower.count() == 0, 'Проверьте, что правильно считается подписки'
-        self.check_url(user_client, f'/profile/{post.author.username}/follow', '/profile/<username>/follow/')
+        self.post_url(user_client, f'/profile/{post.author.username}/follow', '/profile/<username>/follow/')
         assert user.follower.count() == 0, 'Проверьте, что нельзя подписаться на самого себя'
 
         user_1 = get_user_model().objects.create_user(username='TestUser_2344')
         user_2 = get_user_model().objects.create_user(username='TestUser_73485')
 
         self.check_url(user_client, f'/profile/{user_1.username}/follow', '/profile/<username>/follow/')
+        assert user.follower.count() == 0, 'Проверьте, что GET-запрос не подписывает на пользователя'
+        self.post_url(user_client, f'/profile/{user_1.username}/follow', '/profile/<username>/follow/')
         assert user.follower.count() == 1, 'Проверьте, что вы можете подписаться на пользователя'
-        self.check_url(user_client, f'/profile/{user_1.username}/follow', '/profile/<username>/follow/')
+        self.post_url(user_client, f'/profile/{user_1.username}/follow', '/profile/<username>/follow/')
         assert user.follower.count() == 1, 'Проверьте, что вы можете подписаться на пользователя только один раз'
 
         image = tempfile.NamedTemporaryFile(suffix=".jpg").name
@@ -139,21 +149,21 @@ class TestFollow:
             'Проверьте, что на странице `/follow/` список статей авторов на которых подписаны'
         )
 
-        self.check_url(user_client, f'/profile/{user_2.username}/follow', '/profile/<username>/follow/')
+        self.post_url(user_client, f'/profile/{user_2.username}/follow', '/profile/<username>/follow/')
         assert user.follower.count() == 2, 'Проверьте, что вы можете подписаться на пользователя'
         response = self.check_url(user_client, '/follow', '/follow/')
         assert len(response.context['page_obj']) == 5, (
             'Проверьте, что на странице `/follow/` список статей авторов на которых подписаны'
         )
 
-        self.check_url(user_client, f'/profile/{user_1.username}/unfollow', '/profile/<username>/unfollow/')
+        self.post_url(user_client, f'/profile/{user_1.username}/unfollow', '/profile/<username>/unfollow/')
         assert user.follower.count() == 1, 'Проверьте, что вы можете отписаться от пользователя'
         response = self.check_url(user_client, '/follow', '/follow/')
         assert len(response.context['page_obj']) == 3, (
             'Проверьте, что на странице `/follow/` список статей авторов на которых подписаны'
         )
 
-        self.check_url(user_client, f'/profile/{user_2.username}/unfollow', '/profile/<username>/unfollow/')
+        self.post_url(user_client, f'/profile/{user_2.username}/unfollow', '/profile/<username>/unfollow/')
         assert user.follower.count() == 0, 'Проверьте, что вы можете отписаться от пользователя'
         response = self.check_url(user_client, '/follow', '/follow/')
         assert len(response.context['page_obj']) == 0, (
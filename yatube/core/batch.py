@@ -0,0 +1,71 @@
+from django.db import models, transaction
+
+
+def pk_batches(queryset, batch_size):
+    queryset = queryset.order_by('pk')
+    last_pk = None
+    while True:
+        batch = queryset
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        pks = list(batch.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return
+        yield pks
+        last_pk = pks[-1]
+
+
+def _delete_related(model, pks, using):
+    """Удаляет или обнуляет строки, которые ссылаются на pks.
+
+    Повторяет правила on_delete одним запросом на связь, не загружая
+    объекты в память.
+    """
+    for relation in model._meta.related_objects:
+        if not (relation.one_to_many or relation.one_to_one):
+            continue
+        field = relation.field
+        related = relation.related_model._base_manager.using(using).filter(
+            **{'{}__in'.format(field.name): pks}
+        )
+        on_delete = field.remote_field.on_delete
+        if on_delete is models.CASCADE:
+            _delete_related(
+                relation.related_model, related.values('pk'), using
+            )
+            related._raw_delete(using)
+        elif on_delete is models.SET_NULL:
+            related.update(**{field.name: None})
+        elif on_delete is not models.DO_NOTHING:
+            raise ValueError('Связь {} не удалить пакетом'.format(field))
+
+
+def delete_in_batches(queryset, batch_size):
+    """Удаляет записи пакетами, каждый пакет в своей транзакции.
+
+    Пакет и зависимые строки удаляются запросами DELETE по номерам,
+    без загрузки объектов и без сигналов post_delete: их работу
+    выполняет вызывающий код.
+    Возвращает количество удалённых записей и количество пакетов.
+    """
+    manager = queryset.model._base_manager
+    using = queryset.db
+    deleted = batches = 0
+    for pks in pk_batches(queryset, batch_size):
+        with transaction.atomic(using=using):
+            _delete_related(queryset.model, pks, using)
+            deleted += manager.using(using).filter(
+                pk__in=pks
+            )._raw_delete(using)
+        batches += 1
+    return deleted, batches
+
+
+def update_in_batches(queryset, batch_size, **values):
+    manager = queryset.model._base_manager
+    updated = batches = 0
+    for pks in pk_batches(queryset, batch_size):
+        with transaction.atomic():
+            updated += manager.filter(pk__in=pks).update(**values)
+        batches += 1
+    return updated, batches
@@ -0,0 +1,169 @@
+"""Поле для длинного текста, который хранится в базе сжатым.
+
+Формат значения в базе — первый байт задаёт способ хранения:
+
+* ``0x00`` — текст в UTF-8 без сжатия (короче порога
+  TEXT_COMPRESSION_THRESHOLD, где сжатие не окупается);
+* ``0x01`` — zlib без словаря;
+* ``0x02`` и два байта номера — zlib со словарём ``TextDictionary``,
+  обученным на наших текстах командой ``train_text_dictionary``.
+
+Значения, записанные до появления заголовка, — голый поток zlib; он
+всегда начинается с байта ``0x78`` и читается как раньше.
+
+Из базы приходят сжатые байты. Распаковка происходит при первом
+обращении к атрибуту, поэтому выборки, которые текст не показывают,
+ничего не распаковывают, а несжатое значение сохраняется обратно как
+есть.
+"""
+import struct
+import zlib
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+RAW = 0
+ZLIB = 1
+ZLIB_DICTIONARY = 2
+LEGACY_ZLIB = 0x78
+LATEST_DICTIONARY_KEY = 'text_dictionary:latest'
+DICTIONARY_SIZE = 32 * 1024
+
+_dictionaries = {}
+
+
+def dictionary(dictionary_id):
+    if dictionary_id not in _dictionaries:
+        from core.models import TextDictionary
+        _dictionaries[dictionary_id] = bytes(
+            TextDictionary.objects.values_list('data', flat=True).get(
+                pk=dictionary_id
+            )
+        )
+    return _dictionaries[dictionary_id]
+
+
+def latest_dictionary():
+    from core.models import TextDictionary
+    dictionary_id = cache.get(LATEST_DICTIONARY_KEY)
+    if dictionary_id is None:
+        dictionary_id = TextDictionary.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        cache.set(LATEST_DICTIONARY_KEY, dictionary_id, 300)
+    if not dictionary_id:
+        return None, None
+    return dictionary_id, dictionary(dictionary_id)
+
+
+def train_dictionary(texts, size=DICTIONARY_SIZE, max_words=3):
+    """Собирает словарь zlib из частых сочетаний слов в texts.
+
+    zlib дешевле ссылается на конец словаря, поэтому самые выгодные
+    фрагменты (частота на длину) идут последними.
+    """
+    counts = Counter()
+    for text in texts:
+        words = text.split()
+        for length in range(1, max_words + 1):
+            for i in range(len(words) - length + 1):
+                counts[' '.join(words[i:i + length]) + ' '] += 1
+    chosen, total = [], 0
+    for fragment, count in sorted(
+        counts.items(), key=lambda item: -item[1] * len(item[0])
+    ):
+        if count < 2:
+            break
+        data = fragment.encode()
+        if total + len(data) > size:
+            continue
+        chosen.append(data)
+        total += len(data)
+    return b''.join(reversed(chosen))
+
+
+def compress(text, threshold=None, use_dictionary=True):
+    data = text.encode()
+    if threshold is None:
+        threshold = settings.TEXT_COMPRESSION_THRESHOLD
+    if len(data) < threshold:
+        return bytes([RAW]) + data
+    dictionary_id, zdict = (
+        latest_dictionary() if use_dictionary else (None, None)
+    )
+    if zdict is None:
+        return bytes([ZLIB]) + zlib.compress(data, 9)
+    compressor = zlib.compressobj(9, zdict=zdict)
+    return (
+        bytes([ZLIB_DICTIONARY]) + struct.pack('>H', dictionary_id)
+        + compressor.compress(data) + compressor.flush()
+    )
+
+
+def decompress(value):
+    value = bytes(value)
+    if not value:
+        return ''
+    kind = value[0]
+    if kind == RAW:
+        return value[1:].decode()
+    if kind == ZLIB:
+        return zlib.decompress(value[1:]).decode()
+    if kind == ZLIB_DICTIONARY:
+        dictionary_id = struct.unpack('>H', value[1:3])[0]
+        decompressor = zlib.decompressobj(zdict=dictionary(dictionary_id))
+        return (
+            decompressor.decompress(value[3:]) + decompressor.flush()
+        ).decode()
+    if kind == LEGACY_ZLIB:
+        return zlib.decompress(value).decode()
+    raise ValueError('Неизвестный формат сжатого текста: {}'.format(kind))
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, (bytes, memoryview)):
+            value = decompress(value)
+            instance.__dict__[self.field_name] = value
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field_name] = value
+
+
+class CompressedTextField(models.BinaryField):
+    """Текст, который хранится в базе сжатым и распаковывается лениво."""
+    description = 'Сжатый текст'
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('editable', True)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if kwargs.get('editable') is True:
+            del kwargs['editable']
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        setattr(cls, self.attname, CompressedTextDescriptor(self.attname))
+
+    def get_prep_value(self, value):
+        if isinstance(value, str):
+            value = compress(value)
+        return super().get_prep_value(value)
+
+    def to_python(self, value):
+        if isinstance(value, (bytes, memoryview)):
+            return decompress(value)
+        return value
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
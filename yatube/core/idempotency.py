@@ -0,0 +1,87 @@
+"""Ключи идемпотентности для POST-запросов.
+
+Клиент передаёт ключ заголовком ``Idempotency-Key`` или скрытым полем
+формы ``idempotency_key``. Первый запрос с ключом выполняется, и его
+ответ об успешной записи хранится в кэше IDEMPOTENCY_TTL секунд;
+повтор с тем же ключом получает сохранённый ответ и ничего не пишет.
+Пока первый запрос выполняется, повтор ждёт его ответа до
+IDEMPOTENCY_WAIT секунд.
+Запрос без ключа выполняется как обычно.
+"""
+import hashlib
+import time
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.http.response import HttpResponseBase
+
+KEY = 'idempotency:{}:{}:{}'
+FIELD = 'idempotency_key'
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+PENDING = 'pending'
+WAIT_STEP = 0.05
+
+
+def new_key():
+    return uuid.uuid4().hex
+
+
+def request_key(request):
+    return request.META.get(HEADER) or request.POST.get(FIELD)
+
+
+def _claim(key):
+    """Занимает ключ или возвращает ответ запроса, который его занял."""
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT
+    while not cache.add(key, PENDING, settings.IDEMPOTENCY_TTL):
+        stored = cache.get(key)
+        if isinstance(stored, HttpResponseBase):
+            stored['Idempotent-Replayed'] = 'true'
+            return stored
+        if time.monotonic() > deadline:
+            response = HttpResponse(
+                'Запрос с этим ключом ещё выполняется', status=409
+            )
+            response['Retry-After'] = '1'
+            return response
+        time.sleep(WAIT_STEP)
+    return None
+
+
+def idempotent(scope):
+    """Повторяет сохранённый ответ на POST с уже виденным ключом.
+
+    Ставится под login_required: ключи разделены по пользователям.
+    Сохраняются только ответы об успешной записи — 201 и
+    перенаправления. Форма с ошибками возвращается с кодом 200 или
+    400, и исправленную форму можно отправить с тем же ключом.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            token = request.method == 'POST' and request_key(request)
+            if not token:
+                return view(request, *args, **kwargs)
+            key = KEY.format(
+                scope,
+                request.user.pk,
+                hashlib.sha256(token.encode()).hexdigest()
+            )
+            stored = _claim(key)
+            if stored is not None:
+                return stored
+            try:
+                response = view(request, *args, **kwargs)
+            except Exception:
+                cache.delete(key)
+                raise
+            if 200 < response.status_code < 400 and not response.streaming:
+                cache.set(key, response, settings.IDEMPOTENCY_TTL)
+            else:
+                cache.delete(key)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Общий кэш стоит на пути каждого запроса. Кэш в памяти процесса не
+# виден другим воркерам, а в файлах и в базе каждое обращение к нему —
+# дисковый ввод-вывод или SQL-запрос.
+UNSUITABLE_CACHES = {
+    'django.core.cache.backends.db.DatabaseCache',
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает production-сервер gunicorn: предварительно загруженное '
+        'приложение, gevent-воркеры по числу ядер, перезапуск воркеров '
+        'после max-requests и перезагрузка без простоя по SIGHUP'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default=settings.SERVE_BIND)
+        parser.add_argument(
+            '--workers', type=int, default=settings.SERVE_WORKERS
+        )
+        parser.add_argument(
+            '--threads', type=int, default=settings.SERVE_THREADS
+        )
+        parser.add_argument(
+            '--worker-class', default=settings.SERVE_WORKER_CLASS,
+            help='gevent по умолчанию; пустое значение выбирает gthread '
+                 'по --threads'
+        )
+        parser.add_argument(
+            '--worker-connections', type=int,
+            default=settings.SERVE_WORKER_CONNECTIONS
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=settings.SERVE_MAX_REQUESTS
+        )
+        parser.add_argument(
+            '--max-requests-jitter', type=int,
+            default=settings.SERVE_MAX_REQUESTS_JITTER
+        )
+        parser.add_argument(
+            '--timeout', type=int, default=settings.SERVE_TIMEOUT
+        )
+
+    def check_cache(self):
+        backend = settings.CACHES['default']['BACKEND']
+        if backend in UNSUITABLE_CACHES:
+            raise CommandError(
+                'serve требует общий кэш в памяти (memcached или redis), '
+                'задан {}: укажите CACHE_BACKEND и CACHE_LOCATION'.format(
+                    backend
+                )
+            )
+
+    def get_options(self, options):
+        worker_class = options['worker_class'] or (
+            'gthread' if options['threads'] > 1 else 'sync'
+        )
+        # SSE-поток занимает sync-воркер целиком до LIVE_MAX_DURATION,
+        # а gthread-воркер — один из своих потоков.
+        if worker_class == 'sync':
+            raise CommandError(
+                'sync-воркеры не обслуживают SSE-потоки: задайте '
+                '--threads больше 1 или асинхронный --worker-class'
+            )
+        return {
+            'bind': options['bind'],
+            'workers': options['workers'],
+            'threads': options['threads'],
+            'worker_class': worker_class,
+            'worker_connections': options['worker_connections'],
+            'max_requests': options['max_requests'],
+            'max_requests_jitter': options['max_requests_jitter'],
+            'timeout': options['timeout'],
+            'graceful_timeout': options['timeout'],
+            # Приложение загружается и прогревается в мастере до fork.
+            'preload_app': True,
+        }
+
+    def handle(self, *args, **options):
+        from gunicorn.app.base import BaseApplication
+
+        self.check_cache()
+        config = self.get_options(options)
+        if config['worker_class'] == 'gevent':
+            # Приложение загружается в мастере до fork, и без патча до
+            # загрузки модули получили бы обычные сокеты и блокировки.
+            from gevent import monkey
+            monkey.patch_all()
+
+        class Application(BaseApplication):
+            def load_config(self):
+                for key, value in config.items():
+                    self.cfg.set(key, value)
+
+            def load(self):
+                from yatube.wsgi import application
+                return application
+
+        Application().run()
@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from core import startup
+
+
+class Command(BaseCommand):
+    help = 'Показывает, какие модули дольше всего импортируются при запуске'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument(
+            '--code', default=startup.SETUP_CODE,
+            help='Код, импорт которого нужно замерить'
+        )
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        modules = startup.import_times(options['code'])
+        slowest = sorted(modules, key=lambda item: -item[1])
+        slowest = slowest[:options['limit']]
+        packages = startup.by_package(modules)[:options['limit']]
+        total = sum(own for _, own, _ in modules)
+        if options['json']:
+            self.stdout.write(json.dumps({
+                'total_us': total,
+                'modules': [
+                    {'name': name, 'self_us': own, 'total_us': total_us}
+                    for name, own, total_us in slowest
+                ],
+                'packages': dict(packages),
+            }, indent=2))
+            return
+        self.stdout.write(
+            f'Всего: {total / 1000:.1f} мс, модулей: {len(modules)}'
+        )
+        self.stdout.write('Пакеты:')
+        for package, own in packages:
+            self.stdout.write(f'  {own / 1000:8.1f} мс  {package}')
+        self.stdout.write('Модули:')
+        for name, own, total_us in slowest:
+            self.stdout.write(
+                f'  {own / 1000:8.1f} мс  {total_us / 1000:8.1f} мс  {name}'
+            )
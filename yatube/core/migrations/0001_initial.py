@@ -0,0 +1,27 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TextDictionary',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField(verbose_name='Словарь')),
+                ('samples', models.PositiveIntegerField(verbose_name='Текстов в выборке')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата обучения')),
+            ],
+            options={
+                'verbose_name': 'Словарь сжатия текста',
+                'verbose_name_plural': 'Словари сжатия текста',
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+from django.core.cache import cache
+from django.db import models
+
+from core.fields import LATEST_DICTIONARY_KEY
+
+
+class TextDictionary(models.Model):
+    """Словарь zlib для CompressedTextField.
+
+    Словари только добавляются: по номеру словаря в заголовке значения
+    распаковывается всё, что было им сжато.
+    """
+    data = models.BinaryField('Словарь')
+    samples = models.PositiveIntegerField('Текстов в выборке')
+    created = models.DateTimeField('Дата обучения', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Словарь сжатия текста'
+        verbose_name_plural = 'Словари сжатия текста'
+
+    def __str__(self):
+        return f'{self.pk}: {len(self.data)} байт'
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(LATEST_DICTIONARY_KEY)
@@ -0,0 +1,85 @@
+"""Замеры запросов к базе и времени ответа для тестов производительности."""
+import gc
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.db import connection
+
+METRICS = ('queries', 'rows', 'time_ms')
+
+
+class QueryRecorder:
+    """Запоминает SQL-запросы, выполненные внутри execute_wrapper."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    def rows(self):
+        """Число строк, которые вернули SELECT-запросы."""
+        total = 0
+        with connection.cursor() as cursor:
+            for sql, params in self.statements:
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute('SELECT COUNT(*) FROM (' + sql + ')', params)
+                total += cursor.fetchone()[0]
+        return total
+
+
+def measure(client, path, repeat=1):
+    """Запросы, строки и время ответа на GET path.
+
+    При repeat > 1 запрос повторяется, и время — медиана повторов:
+    так сравнение двух версий view меньше зависит от случайных пауз.
+    Запросы и строки считаются по первому повтору.
+    """
+    recorders, timings = [], []
+    for _ in range(repeat):
+        recorders.append(QueryRecorder())
+        # Сборка мусора от предыдущих тестов не должна попадать в замер.
+        gc.collect()
+        with connection.execute_wrapper(recorders[-1]):
+            started = time.perf_counter()
+            response = client.get(path)
+            timings.append(time.perf_counter() - started)
+    return response, {
+        'path': path,
+        'queries': len(recorders[0].statements),
+        'rows': recorders[0].rows(),
+        'time_ms': round(statistics.median(timings) * 1000, 2),
+    }
+
+
+def limit(budget, metric, tolerance=None):
+    if tolerance is None:
+        tolerance = settings.PERF_BUDGET_TOLERANCE
+    value = budget[metric] * (1 + tolerance)
+    return value if metric == 'time_ms' else int(value)
+
+
+def violations(result, budget, tolerance=None):
+    """Список превышений бюджета в виде читаемых строк."""
+    problems = []
+    for metric in METRICS:
+        allowed = limit(budget, metric, tolerance)
+        if result[metric] > allowed:
+            problems.append('{}: {} > {} (бюджет {})'.format(
+                metric, result[metric], allowed, budget[metric]
+            ))
+    return problems
+
+
+def write_report(path, results, tolerance=None):
+    if tolerance is None:
+        tolerance = settings.PERF_BUDGET_TOLERANCE
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(
+            {'tolerance': tolerance, 'views': results},
+            f, ensure_ascii=False, indent=2, sort_keys=True
+        )
@@ -0,0 +1,72 @@
+"""Замер времени запуска и прогрев процесса перед fork."""
+import os
+import re
+import subprocess
+import sys
+
+from django.conf import settings
+
+SETUP_CODE = 'import django; django.setup()'
+IMPORTTIME_LINE = re.compile(
+    r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$'
+)
+
+
+def import_times(code=SETUP_CODE):
+    """Запускает code в отдельном интерпретаторе с -X importtime.
+
+    Возвращает список (модуль, собственное время, суммарное время)
+    в микросекундах.
+    """
+    env = dict(os.environ)
+    env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=settings.BASE_DIR, env=env, stderr=subprocess.PIPE,
+        stdout=subprocess.DEVNULL, universal_newlines=True, check=True,
+    )
+    modules = []
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, total, _, name = match.groups()
+            modules.append((name, int(own), int(total)))
+    return modules
+
+
+def by_package(modules):
+    packages = {}
+    for name, own, _ in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+    return sorted(packages.items(), key=lambda item: -item[1])
+
+
+def template_names():
+    for directory in settings.TEMPLATES[0]['DIRS']:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    path = os.path.join(root, filename)
+                    yield os.path.relpath(path, directory).replace(
+                        os.sep, '/'
+                    )
+
+
+def warm():
+    """Загружает то, что иначе грузится на первом запросе.
+
+    Вызывается в мастер-процессе до fork, чтобы воркеры получили
+    готовые модули, шаблоны и URL-резолвер через copy-on-write.
+    """
+    from django.template.loader import get_template
+    from django.urls import get_resolver
+    from PIL import Image
+    from sorl.thumbnail import default
+
+    get_resolver()._populate()
+    for name in template_names():
+        get_template(name)
+    Image.init()
+    default.backend
+    default.kvstore
@@ -0,0 +1,63 @@
+import mimetypes
+import os
+import re
+
+HASHED_NAME = re.compile(r'\.[0-9a-f]{12}\.')
+IMMUTABLE = 'public, max-age=31536000, immutable'
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class StaticFilesApplication:
+    """WSGI-обёртка, которая отдаёт собранную статику без участия Django."""
+
+    def __init__(self, application, root, prefix, max_age=60):
+        self.application = application
+        self.root = os.path.realpath(root)
+        self.prefix = prefix
+        self.max_age = max_age
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (environ['REQUEST_METHOD'] not in ('GET', 'HEAD')
+                or not path.startswith(self.prefix)):
+            return self.application(environ, start_response)
+        filename = self.find(path[len(self.prefix):])
+        if filename is None:
+            return self.application(environ, start_response)
+        return self.serve(environ, start_response, filename)
+
+    def find(self, name):
+        filename = os.path.realpath(os.path.join(self.root, name))
+        if not filename.startswith(self.root + os.sep):
+            return None
+        if not os.path.isfile(filename):
+            return None
+        return filename
+
+    def serve(self, environ, start_response, filename):
+        content_type, _ = mimetypes.guess_type(filename)
+        headers = [
+            ('Content-Type', content_type or 'application/octet-stream'),
+            ('Vary', 'Accept-Encoding'),
+        ]
+        if HASHED_NAME.search(os.path.basename(filename)):
+            headers.append(('Cache-Control', IMMUTABLE))
+        else:
+            headers.append(
+                ('Cache-Control', f'public, max-age={self.max_age}')
+            )
+        accept = environ.get('HTTP_ACCEPT_ENCODING', '')
+        for encoding, suffix in ENCODINGS:
+            if encoding in accept and os.path.isfile(filename + suffix):
+                filename += suffix
+                headers.append(('Content-Encoding', encoding))
+                break
+        headers.append(('Content-Length', str(os.path.getsize(filename))))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        file_wrapper = environ.get(
+            'wsgi.file_wrapper',
+            lambda file, size: iter(lambda: file.read(size), b'')
+        )
+        return file_wrapper(open(filename, 'rb'), 8192)
@@ -0,0 +1,104 @@
+import gzip
+import re
+import threading
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE = re.compile(r'\.(css|js|svg|txt|html|json|map|ico)$')
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    manifest_strict = False
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(
+            paths, dry_run, **options
+        ):
+            if (not dry_run and hashed_name and not isinstance(
+                    processed, Exception) and COMPRESSIBLE.search(name)):
+                self._compress(name)
+                self._compress(hashed_name)
+            yield name, hashed_name, processed
+
+    def _compress(self, name):
+        with self.open(name) as original:
+            content = original.read()
+        encoders = [('.gz', lambda data: gzip.compress(data, 9))]
+        if brotli is not None:
+            encoders.append(('.br', brotli.compress))
+        for suffix, encode in encoders:
+            compressed = encode(content)
+            if len(compressed) >= len(content):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+
+
+@deconstructible
+class InMemoryStorage(Storage):
+    """Файловое хранилище в памяти процесса для тестов.
+
+    Файлы общие для всех экземпляров, как у хранилища на диске:
+    sorl-thumbnail и Django создают свои экземпляры хранилища.
+    """
+    _files = {}
+    _lock = threading.Lock()
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url or settings.MEDIA_URL
+
+    def _open(self, name, mode='rb'):
+        content, _ = self._files[name]
+        return ContentFile(content, name=name)
+
+    def _save(self, name, content):
+        content.seek(0)
+        data = content.read()
+        if isinstance(data, str):
+            data = data.encode()
+        with self._lock:
+            self._files[name] = (data, timezone.now())
+        return name
+
+    def delete(self, name):
+        with self._lock:
+            self._files.pop(name, None)
+
+    def exists(self, name):
+        return name in self._files
+
+    def listdir(self, path):
+        prefix = path.rstrip('/') + '/' if path else ''
+        directories, files = set(), set()
+        for name in self._files:
+            if not name.startswith(prefix):
+                continue
+            head, _, tail = name[len(prefix):].partition('/')
+            if tail:
+                directories.add(head)
+            else:
+                files.add(head)
+        return sorted(directories), sorted(files)
+
+    def size(self, name):
+        return len(self._files[name][0])
+
+    def url(self, name):
+        return urljoin(self.base_url, name)
+
+    def get_modified_time(self, name):
+        return self._files[name][1]
+
+    get_created_time = get_accessed_time = get_modified_time
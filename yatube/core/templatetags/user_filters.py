@@ -1,4 +1,7 @@
 from django import template
+from django.utils.html import format_html
+
+from core import idempotency
 
 register = template.Library()
 
@@ -6,3 +9,11 @@ register = template.Library()
 @register.filter
 def addclass(field, css):
     return field.as_widget(attrs={'class': css})
+
+
+@register.simple_tag
+def idempotency_input():
+    return format_html(
+        '<input type="hidden" name="{}" value="{}">',
+        idempotency.FIELD, idempotency.new_key()
+    )
@@ -0,0 +1,203 @@
+import gzip
+import os
+import shutil
+import tempfile
+import zlib
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import get_resolver, reverse
+
+from core import fields, startup
+from core.management.commands.serve import Command as ServeCommand
+from core.models import TextDictionary
+from core.static import StaticFilesApplication
+
+CSS = b'body { color: black; }\n' * 100
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.source = tempfile.mkdtemp()
+        cls.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(cls.source, 'css'))
+        with open(os.path.join(cls.source, 'css', 'site.css'), 'wb') as f:
+            f.write(CSS)
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.source, ignore_errors=True)
+        shutil.rmtree(cls.root, ignore_errors=True)
+
+    def collect(self):
+        with override_settings(
+            STATICFILES_DIRS=[self.source],
+            STATIC_ROOT=self.root,
+            STATICFILES_STORAGE=(
+                'core.storage.CompressedManifestStaticFilesStorage'
+            ),
+        ):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            return staticfiles_storage.stored_name('css/site.css')
+
+    def request(self, path, encoding=''):
+        status = {}
+
+        def start_response(code, headers):
+            status['code'] = code
+            status['headers'] = dict(headers)
+
+        app = StaticFilesApplication(
+            lambda environ, start_response: [b'django'],
+            self.root,
+            '/static/'
+        )
+        body = b''.join(app({
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'HTTP_ACCEPT_ENCODING': encoding,
+        }, start_response))
+        return status, body
+
+    def test_collectstatic_writes_hashed_and_compressed_files(self):
+        hashed = self.collect()
+        self.assertRegex(hashed, r'css/site\.[0-9a-f]{12}\.css')
+        with open(os.path.join(self.root, hashed + '.gz'), 'rb') as f:
+            self.assertEqual(gzip.decompress(f.read()), CSS)
+
+    def test_hashed_files_are_immutable_and_compressed(self):
+        hashed = self.collect()
+        status, body = self.request('/static/' + hashed, 'gzip, deflate')
+        self.assertEqual(status['code'], '200 OK')
+        self.assertIn('immutable', status['headers']['Cache-Control'])
+        self.assertEqual(status['headers']['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(body), CSS)
+
+    def test_unknown_paths_fall_through_to_django(self):
+        self.collect()
+        for path in ('/static/missing.css', '/static/../etc/passwd', '/'):
+            with self.subTest(path=path):
+                self.assertEqual(self.request(path)[1], b'django')
+
+
+class StartupTests(SimpleTestCase):
+    def test_setup_defers_admin_registration_and_images(self):
+        modules = {name for name, _, _ in startup.import_times()}
+        self.assertIn('posts.signals', modules)
+        self.assertNotIn('posts.admin', modules)
+        self.assertNotIn('PIL.Image', modules)
+        self.assertNotIn('sorl.thumbnail.engines.pil_engine', modules)
+        # Пакеты установленных приложений setup() импортирует всегда.
+        self.assertIn('django.contrib.admin.sites', modules)
+        self.assertIn('sorl.thumbnail.default', modules)
+
+    def test_warm_loads_resolver_and_templates(self):
+        startup.warm()
+        self.assertTrue(get_resolver()._populated)
+        self.assertIn('posts/index.html', set(startup.template_names()))
+
+
+class HealthTests(TestCase):
+    def test_healthy(self):
+        response = self.client.get(reverse('health'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'database': 'ok', 'cache': 'ok'})
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache'
+    }})
+    def test_broken_cache_is_not_ready(self):
+        with self.assertLogs('core.views', 'ERROR'):
+            response = self.client.get(reverse('health'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['database'], 'ok')
+        self.assertEqual(response.json()['cache'], 'error')
+
+
+class ServeTests(SimpleTestCase):
+    def get_options(self, *args):
+        command = ServeCommand()
+        parser = command.create_parser('manage.py', 'serve')
+        return command.get_options(vars(parser.parse_args(args)))
+
+    def test_defaults_preload_and_recycle_workers(self):
+        options = self.get_options()
+        self.assertTrue(options['preload_app'])
+        self.assertEqual(options['worker_class'], 'gevent')
+        self.assertGreater(options['worker_connections'], 1)
+        self.assertGreater(options['timeout'], settings.LIVE_MAX_DURATION)
+        self.assertGreater(options['max_requests'], 0)
+
+    def test_local_and_database_caches_are_refused(self):
+        for backend in ('locmem.LocMemCache', 'db.DatabaseCache'):
+            with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.' + backend
+            }}):
+                with self.assertRaises(CommandError):
+                    ServeCommand().check_cache()
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': '127.0.0.1:11211',
+        }}):
+            ServeCommand().check_cache()
+
+    def test_sync_workers_are_refused(self):
+        with self.assertRaises(CommandError):
+            self.get_options('--worker-class', '', '--threads', '1')
+        with self.assertRaises(CommandError):
+            self.get_options('--worker-class', 'sync')
+
+    def test_threads_switch_to_thread_workers(self):
+        options = self.get_options(
+            '--worker-class', '', '--workers', '2', '--threads', '4'
+        )
+        self.assertEqual(options['workers'], 2)
+        self.assertEqual(options['worker_class'], 'gthread')
+
+    def test_worker_class_can_be_chosen(self):
+        options = self.get_options('--worker-class', 'gthread')
+        self.assertEqual(options['worker_class'], 'gthread')
+
+
+class CompressedTextTests(TestCase):
+    text = 'Длинный пост про котиков и собак. ' * 20
+
+    def setUp(self):
+        cache.clear()
+
+    def test_short_text_is_stored_raw(self):
+        value = fields.compress('Короткий', threshold=256)
+        self.assertEqual(value[0], fields.RAW)
+        self.assertEqual(fields.decompress(value), 'Короткий')
+
+    def test_long_text_is_compressed(self):
+        value = fields.compress(self.text, threshold=256)
+        self.assertEqual(value[0], fields.ZLIB)
+        self.assertLess(len(value), len(self.text.encode()) // 4)
+        self.assertEqual(fields.decompress(value), self.text)
+
+    def test_dictionary_compression(self):
+        without = fields.compress(self.text, threshold=0)
+        dictionary = TextDictionary.objects.create(
+            data=fields.train_dictionary([self.text] * 3), samples=3
+        )
+        value = fields.compress(self.text, threshold=0)
+        self.assertEqual(value[0], fields.ZLIB_DICTIONARY)
+        self.assertEqual(
+            int.from_bytes(value[1:3], 'big'), dictionary.pk
+        )
+        self.assertLess(len(value), len(without))
+        fields._dictionaries.clear()
+        self.assertEqual(fields.decompress(value), self.text)
+
+    def test_legacy_zlib_values_are_readable(self):
+        self.assertEqual(
+            fields.decompress(zlib.compress(self.text.encode())), self.text
+        )
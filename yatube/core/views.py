@@ -1,4 +1,12 @@
+import logging
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import JsonResponse
 from django.shortcuts import render
+from django.views.decorators.cache import never_cache
+
+logger = logging.getLogger(__name__)
 
 
 def page_not_found(request, exception):
@@ -11,3 +19,33 @@ def csrf_failure(request, reason=''):
 
 def page_error(request):
     return render(request, 'core/500.html')
+
+
+def _check_database():
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.fetchone()
+
+
+def _check_cache():
+    cache.set('health', 'ok', 10)
+    if cache.get('health') != 'ok':
+        raise RuntimeError('кэш не вернул записанное значение')
+
+
+@never_cache
+def health(request):
+    """Готовность процесса: доступность базы данных и кэша."""
+    checks = {}
+    for name, check in (
+        ('database', _check_database), ('cache', _check_cache)
+    ):
+        try:
+            check()
+        except Exception:
+            logger.exception('Проверка готовности %s не прошла', name)
+            checks[name] = 'error'
+        else:
+            checks[name] = 'ok'
+    healthy = all(value == 'ok' for value in checks.values())
+    return JsonResponse(checks, status=200 if healthy else 503)
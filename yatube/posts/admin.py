@@ -1,6 +1,47 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.contrib.admin.widgets import AutocompleteSelect
+from django.core.paginator import Paginator
+from django.db.models import Max
+from django.utils.functional import cached_property
 
-from posts.models import Group, Post
+from core.batch import delete_in_batches, update_in_batches
+from posts import duplicates, follow_graph, group_stats, search
+from posts.models import Comment, ContentSignature, Follow, Group, Post
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        threshold = settings.ADMIN_COUNT_ESTIMATE_THRESHOLD
+        queryset = self.object_list.order_by()
+        limited = queryset[:threshold + 1].count()
+        if limited <= threshold:
+            return limited
+        if queryset.query.where:
+            return queryset.count()
+        return queryset.aggregate(estimate=Max('pk'))['estimate']
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        widget=AutocompleteSelect(
+            Post._meta.get_field('group').remote_field, admin.site
+        )
+    )
+
+
+def affected_groups(queryset):
+    return set(
+        queryset.order_by().exclude(group=None).values_list(
+            'group', flat=True
+        ).distinct()
+    )
 
 
 @admin.register(Post)
@@ -14,9 +55,69 @@ class PostAdmin(admin.ModelAdmin):
     )
     list_filter = ('pub_date',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    date_hierarchy = 'pub_date'
     search_fields = ('text',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
+    action_form = PostActionForm
+    actions = ('move_to_group', 'delete_posts_in_batches')
     empty_value_display = '-пусто-'
 
+    def move_to_group(self, request, queryset):
+        form = self.action_form(request.POST)
+        form.fields['action'].choices = self.get_action_choices(request)
+        group = form.cleaned_data['group'] if form.is_valid() else None
+        if group is None:
+            self.message_user(
+                request, 'Выберите группу для переноса', messages.ERROR
+            )
+            return
+        groups = affected_groups(queryset) | {group.pk}
+        updated, batches = update_in_batches(
+            queryset, settings.ADMIN_BATCH_SIZE, group=group
+        )
+        group_stats.rebuild(groups)
+        self.message_user(
+            request,
+            f'Перенесено постов: {updated} (пакетов: {batches})'
+        )
+    move_to_group.short_description = 'Перенести в группу'
+    move_to_group.allowed_permissions = ('change',)
+
+    def delete_posts_in_batches(self, request, queryset):
+        groups = affected_groups(queryset)
+        comments = Comment.objects.filter(post__in=queryset.values('pk'))
+        duplicates.forget(
+            ContentSignature.COMMENT, comments.values('pk'),
+            settings.ADMIN_BATCH_SIZE
+        )
+        duplicates.forget(
+            ContentSignature.POST, queryset.values('pk'),
+            settings.ADMIN_BATCH_SIZE
+        )
+        comments, _ = delete_in_batches(comments, settings.ADMIN_BATCH_SIZE)
+        posts, batches = delete_in_batches(
+            queryset, settings.ADMIN_BATCH_SIZE
+        )
+        group_stats.rebuild(groups)
+        self.message_user(
+            request,
+            f'Удалено постов: {posts}, комментариев: {comments} '
+            f'(пакетов: {batches})'
+        )
+    delete_posts_in_batches.short_description = 'Удалить пакетами'
+    delete_posts_in_batches.allowed_permissions = ('delete',)
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip() or not search.is_available():
+            return super().get_search_results(
+                request, queryset, search_term
+            )
+        return search.filter_posts(queryset, search_term), False
+
 
 @admin.register(Group)
 class GroupAdmin(admin.ModelAdmin):
@@ -26,4 +127,90 @@ class GroupAdmin(admin.ModelAdmin):
         'description'
     )
     list_filter = ('slug',)
+    search_fields = ('title', 'slug')
     empty_value_display = '-пусто-'
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'text',
+        'author',
+        'post',
+        'created'
+    )
+    list_select_related = ('author', 'post')
+    raw_id_fields = ('author', 'post')
+    search_fields = ('text', 'author__username')
+    show_full_result_count = False
+    actions = ('purge_author_comments',)
+    empty_value_display = '-пусто-'
+
+    def purge_author_comments(self, request, queryset):
+        authors = set(
+            queryset.order_by().values_list('author', flat=True).distinct()
+        )
+        comments = Comment.objects.filter(author__in=authors)
+        duplicates.forget(
+            ContentSignature.COMMENT, comments.values('pk'),
+            settings.ADMIN_BATCH_SIZE
+        )
+        comments, batches = delete_in_batches(
+            comments, settings.ADMIN_BATCH_SIZE
+        )
+        self.message_user(
+            request,
+            f'Удалено комментариев: {comments} от авторов: {len(authors)} '
+            f'(пакетов: {batches})'
+        )
+    purge_author_comments.short_description = (
+        'Удалить все комментарии этих авторов'
+    )
+    purge_author_comments.allowed_permissions = ('delete',)
+
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'user',
+        'author'
+    )
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    show_full_result_count = False
+    actions = ('remove_follows',)
+
+    def remove_follows(self, request, queryset):
+        users = set(
+            queryset.order_by().values_list('user', flat=True).distinct()
+        )
+        follows, batches = delete_in_batches(
+            queryset, settings.ADMIN_BATCH_SIZE
+        )
+        for user_id in users:
+            follow_graph.invalidate(user_id)
+        self.message_user(
+            request, f'Удалено подписок: {follows} (пакетов: {batches})'
+        )
+    remove_follows.short_description = 'Удалить подписки пакетами'
+    remove_follows.allowed_permissions = ('delete',)
+
+
+@admin.register(ContentSignature)
+class ContentSignatureAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'author',
+        'duplicate_of',
+        'created'
+    )
+    list_filter = ('kind',)
+    list_select_related = ('author', 'duplicate_of')
+    raw_id_fields = ('author', 'duplicate_of')
+    exclude = ('signature',)
+    show_full_result_count = False
@@ -0,0 +1,78 @@
+"""Перенос старых постов с комментариями в архивные таблицы.
+
+Лента, группы и поиск работают только с рабочей таблицей, поэтому она
+остаётся небольшой. Архивные посты доступны только для чтения на
+странице поста и в профиле автора.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.batch import pk_batches
+from posts import group_stats
+from posts.models import (ArchivedComment, ArchivedPost, Comment,
+                          NotificationEvent, Post, PostRank, PostRevision)
+
+
+def _archive_batch(pks):
+    # Чтение и удаление в одной транзакции: комментарий или правка,
+    # сделанные между ними, иначе пропали бы при удалении поста.
+    # select_for_update держит строки постов до конца переноса.
+    with transaction.atomic():
+        posts = list(
+            Post.objects.select_for_update().filter(pk__in=pks).values(
+                'id', 'text', 'excerpt', 'excerpt_html', 'has_more',
+                'pub_date', 'author_id', 'group_id', 'image'
+            )
+        )
+        pks = [post['id'] for post in posts]
+        comments = list(Comment.objects.filter(post_id__in=pks).values(
+            'id', 'post_id', 'author_id', 'text', 'created'
+        ))
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**post) for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**comment) for comment in comments
+        )
+        # История правок и уведомления переходят к архивному посту.
+        # Рейтинг считается только по окну TRENDING_WINDOW_HOURS, и
+        # старым постам он не нужен.
+        for model in (PostRevision, NotificationEvent):
+            model.objects.filter(post_id__in=pks).update(
+                archived_post=F('post'), post=None
+            )
+        PostRank.objects.filter(post_id__in=pks).delete()
+        Post.objects.filter(pk__in=pks).delete()
+    return len(posts), len(comments), {
+        post['group_id'] for post in posts if post['group_id']
+    }
+
+
+def archive_before(cutoff, batch_size=None):
+    """Архивирует посты, опубликованные раньше cutoff.
+
+    Каждый пакет переносится в своей транзакции. Возвращает число
+    перенесённых постов и комментариев.
+    """
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    archived = {'posts': 0, 'comments': 0}
+    groups = set()
+    with group_stats.deferred():
+        for pks in pk_batches(
+            Post.objects.filter(pub_date__lt=cutoff), batch_size
+        ):
+            posts, comments, batch_groups = _archive_batch(pks)
+            archived['posts'] += posts
+            archived['comments'] += comments
+            groups |= batch_groups
+    group_stats.rebuild(groups)
+    return archived
+
+
+def archive_old(days=None, batch_size=None):
+    days = days or settings.ARCHIVE_AFTER_DAYS
+    return archive_before(timezone.now() - timedelta(days=days), batch_size)
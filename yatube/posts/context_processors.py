@@ -0,0 +1,19 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts import notifications as notifications_service
+
+
+def notifications(request):
+    """Счётчик непрочитанных уведомлений для шапки сайта.
+
+    Считается лениво и не больше одного раза за запрос: только там,
+    где счётчик действительно выводится.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {}
+    return {
+        'unread_notifications': SimpleLazyObject(
+            lambda: notifications_service.unread_count(user)
+        )
+    }
@@ -0,0 +1,208 @@
+"""Поиск почти одинаковых постов и комментариев по MinHash и LSH.
+
+Текст разбивается на шинглы — тройки соседних слов; подпись MinHash
+из NUM_PERM чисел оценивает долю общих шинглов у двух текстов. Подпись
+режется на BANDS полос, хеш каждой полосы пишется в ``ContentBucket``.
+Похожие тексты почти наверняка совпадают хотя бы в одной полосе,
+поэтому кандидатов находит один запрос по индексу (band, bucket), а
+точное сходство считается уже по их подписям.
+
+NUM_PERM и BANDS менять нельзя без пересчёта сохранённых подписей.
+"""
+import random
+import re
+import struct
+from collections import defaultdict, namedtuple
+from datetime import timedelta
+from functools import reduce
+from hashlib import blake2b
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.batch import delete_in_batches, pk_batches
+from posts.models import ContentBucket, ContentSignature
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 3
+REJECTED = 'Похожий текст уже публиковали недавно.'
+
+WORD = re.compile(r'\w+')
+# Вместо перестановок хеши шинглов смешиваются с постоянными масками:
+# blake2b уже даёт равномерные 64-битные значения, а XOR считается
+# в несколько раз быстрее умножения по модулю.
+_random = random.Random(48)
+MASKS = [_random.getrandbits(64) for _ in range(NUM_PERM)]
+PACK = struct.Struct('>{}Q'.format(NUM_PERM))
+
+Check = namedtuple('Check', 'kind signature duplicate_of')
+
+
+def _hash(data):
+    return int.from_bytes(blake2b(data, digest_size=8).digest(), 'big')
+
+
+def signature(text):
+    """MinHash-подпись текста или None, если он слишком короткий."""
+    words = WORD.findall(text.lower())
+    if len(words) < settings.DUPLICATE_MIN_WORDS:
+        return None
+    hashes = list({
+        _hash(' '.join(words[i:i + SHINGLE_WORDS]).encode())
+        for i in range(len(words) - SHINGLE_WORDS + 1)
+    })
+    return tuple(min([value ^ mask for value in hashes]) for mask in MASKS)
+
+
+def bands(signature):
+    # Хеш сдвинут на бит, чтобы поместиться в BigIntegerField.
+    return [
+        _hash(struct.pack(
+            '>{}Q'.format(ROWS), *signature[band * ROWS:(band + 1) * ROWS]
+        )) >> 1
+        for band in range(BANDS)
+    ]
+
+
+def similarity(first, second):
+    return sum(a == b for a, b in zip(first, second)) / NUM_PERM
+
+
+def find(kind, signature, threshold=None, exclude=None):
+    """Самая похожая подпись за DUPLICATE_WINDOW_HOURS или None.
+
+    exclude — номер записи, чью подпись не нужно учитывать, например
+    при правке поста.
+    """
+    threshold = threshold or settings.DUPLICATE_THRESHOLD
+    candidates = ContentBucket.objects.filter(
+        reduce(or_, (
+            Q(band=band, bucket=bucket)
+            for band, bucket in enumerate(bands(signature))
+        )),
+        signature__kind=kind,
+        signature__created__gte=timezone.now() - timedelta(
+            hours=settings.DUPLICATE_WINDOW_HOURS
+        )
+    )
+    if exclude is not None:
+        candidates = candidates.exclude(signature__object_id=exclude)
+    candidates = candidates.values_list(
+        'signature_id', 'signature__signature'
+    ).distinct()
+    best, best_score = None, threshold
+    for signature_id, data in candidates:
+        score = similarity(signature, PACK.unpack(bytes(data)))
+        if score >= best_score:
+            best, best_score = signature_id, score
+    return best
+
+
+def check(kind, text, exclude=None):
+    text_signature = signature(text)
+    return Check(
+        kind,
+        text_signature,
+        find(kind, text_signature, exclude=exclude) if text_signature
+        else None
+    )
+
+
+def is_rejected(result):
+    return (
+        result.duplicate_of is not None
+        and settings.DUPLICATE_ACTION == 'reject'
+    )
+
+
+def record(result, object_id, author_id):
+    """Добавляет подпись опубликованной записи в индекс.
+
+    В режиме DUPLICATE_ACTION = 'flag' у дубликата заполняется
+    duplicate_of, и его видно в админке.
+    """
+    if result.signature is None:
+        return None
+    with transaction.atomic():
+        content = ContentSignature.objects.create(
+            kind=result.kind,
+            object_id=object_id,
+            author_id=author_id,
+            signature=PACK.pack(*result.signature),
+            duplicate_of_id=result.duplicate_of
+        )
+        ContentBucket.objects.bulk_create(
+            ContentBucket(signature=content, band=band, bucket=bucket)
+            for band, bucket in enumerate(bands(result.signature))
+        )
+    return content
+
+
+def replace(result, object_id, author_id):
+    """Заменяет подпись изменённой записи новой."""
+    with transaction.atomic():
+        forget(result.kind, [object_id])
+        return record(result, object_id, author_id)
+
+
+def forget(kind, object_ids, batch_size=500):
+    """Удаляет подписи записей object_ids, например удалённых."""
+    return delete_in_batches(ContentSignature.objects.filter(
+        kind=kind, object_id__in=object_ids
+    ), batch_size)[0]
+
+
+def prune(batch_size=500):
+    """Удаляет подписи старше окна DUPLICATE_WINDOW_HOURS."""
+    return delete_in_batches(ContentSignature.objects.filter(
+        created__lt=timezone.now() - timedelta(
+            hours=settings.DUPLICATE_WINDOW_HOURS
+        )
+    ), batch_size)[0]
+
+
+def clusters(queryset, threshold=None, batch_size=500):
+    """Группы почти одинаковых записей среди всех записей queryset.
+
+    Тексты читаются пакетами по batch_size. У каждой корзины один
+    представитель — первая попавшая в неё запись, и новая запись
+    сравнивается не больше чем с BANDS представителями. В памяти
+    остаются только корзины и подписи представителей. Возвращает
+    списки номеров, от старых к новым.
+    """
+    threshold = threshold or settings.DUPLICATE_THRESHOLD
+    signatures = {}
+    buckets = {}
+    parents = {}
+
+    def root(pk):
+        while parents.get(pk, pk) != pk:
+            pk = parents[pk]
+        return pk
+
+    for pks in pk_batches(queryset, batch_size):
+        for pk, text in queryset.model.objects.filter(
+            pk__in=pks
+        ).values_list('pk', 'text'):
+            text_signature = signature(text)
+            if text_signature is None:
+                continue
+            for key in enumerate(bands(text_signature)):
+                other = buckets.setdefault(key, pk)
+                if other == pk:
+                    signatures[pk] = text_signature
+                elif root(other) != root(pk) and similarity(
+                    text_signature, signatures[other]
+                ) >= threshold:
+                    parents[root(pk)] = root(other)
+    groups = defaultdict(list)
+    for pk in parents:
+        groups[root(pk)].append(pk)
+    return sorted(
+        sorted(set(group) | {first}) for first, group in groups.items()
+    )
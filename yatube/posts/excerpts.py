@@ -0,0 +1,53 @@
+"""Отрывок и готовый HTML поста, которые хранятся рядом с текстом.
+
+Ленты показывают сохранённый отрывок со ссылкой «читать дальше» и не
+читают полный текст поста, а страница поста выводит готовый HTML без
+экранирования на каждый запрос.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.template.defaultfilters import linebreaksbr
+from django.utils.text import Truncator
+
+from core.batch import pk_batches
+
+FIELDS = ('excerpt', 'excerpt_html', 'text_html', 'has_more')
+
+
+def excerpt(text):
+    return Truncator(text).words(settings.EXCERPT_WORDS)
+
+
+def render(text):
+    return linebreaksbr(text, autoescape=True)
+
+
+def fill(post, with_text_html=True):
+    """Заполняет поля FIELDS по post.text."""
+    post.excerpt = excerpt(post.text)
+    post.excerpt_html = render(post.excerpt)
+    post.has_more = len(post.text.split()) > settings.EXCERPT_WORDS
+    if with_text_html:
+        post.text_html = render(post.text)
+
+
+def rebuild(model, batch_size=500, queryset=None):
+    """Пересчитывает поля FIELDS у постов queryset (по умолчанию всех).
+
+    Нужен после изменения правил отрисовки или EXCERPT_WORDS.
+    """
+    if queryset is None:
+        queryset = model.objects.all()
+    fields = [
+        name for name in FIELDS
+        if any(field.name == name for field in model._meta.concrete_fields)
+    ]
+    updated = 0
+    for pks in pk_batches(queryset, batch_size):
+        posts = list(model.objects.filter(pk__in=pks).only('text'))
+        for post in posts:
+            fill(post, with_text_html='text_html' in fields)
+        with transaction.atomic():
+            model.objects.bulk_update(posts, fields)
+        updated += len(posts)
+    return updated
@@ -0,0 +1,97 @@
+"""Кэш графа подписок внутри процесса.
+
+Для каждого пользователя хранится отсортированный массив id авторов,
+на которых он подписан, и версия этого массива. Версии лежат в общем
+кэше и меняются сигналами ``Follow``. Процесс сверяет версию не чаще
+раза в FOLLOW_GRAPH_VERSION_TTL секунд, а в остальное время отвечает
+из памяти, не обращаясь ни к базе, ни к кэшу. Процесс, в котором
+подписка изменилась, видит изменение сразу, остальные — не позже чем
+через FOLLOW_GRAPH_VERSION_TTL секунд.
+
+В процессе хранится не больше FOLLOW_GRAPH_SIZE пользователей; давно
+не запрошенные вытесняются первыми.
+"""
+import threading
+import time
+import uuid
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from posts.models import Follow
+
+VERSION_KEY = 'follow_graph:{}'
+
+_graph = OrderedDict()
+_lock = threading.Lock()
+
+
+def _version(user_id):
+    key = VERSION_KEY.format(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+def _rotate(user_id):
+    cache.set(VERSION_KEY.format(user_id), uuid.uuid4().hex, None)
+    with _lock:
+        _graph.pop(user_id, None)
+
+
+def invalidate(user_id):
+    # Ещё раз после коммита: граф, загруженный до коммита, не увидел
+    # бы изменения, но получил бы уже новую версию.
+    _rotate(user_id)
+    transaction.on_commit(lambda: _rotate(user_id))
+
+
+def authors(user_id):
+    with _lock:
+        entry = _graph.get(user_id)
+        if entry is not None and time.monotonic() < entry[2]:
+            _graph.move_to_end(user_id)
+            return entry[1]
+    version = _version(user_id)
+    checked_until = time.monotonic() + settings.FOLLOW_GRAPH_VERSION_TTL
+    if entry is not None and entry[0] == version:
+        followed = entry[1]
+    else:
+        followed = array('l', sorted(
+            Follow.objects.filter(user_id=user_id).values_list(
+                'author', flat=True
+            )
+        ))
+    with _lock:
+        _graph[user_id] = (version, followed, checked_until)
+        _graph.move_to_end(user_id)
+        while len(_graph) > settings.FOLLOW_GRAPH_SIZE:
+            _graph.popitem(last=False)
+    return followed
+
+
+def is_following(user_id, author_id):
+    followed = authors(user_id)
+    index = bisect_left(followed, author_id)
+    return index < len(followed) and followed[index] == author_id
+
+
+def following_among(user_id, author_ids):
+    followed = authors(user_id)
+    result = set()
+    for author_id in author_ids:
+        index = bisect_left(followed, author_id)
+        if index < len(followed) and followed[index] == author_id:
+            result.add(author_id)
+    return result
+
+
+def clear():
+    with _lock:
+        _graph.clear()
@@ -0,0 +1,112 @@
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Count, F, Max, Q, Subquery
+
+from posts.models import Group, GroupAuthorStats, GroupStats, Post
+
+TOP_AUTHORS = 3
+
+_state = threading.local()
+
+
+@contextmanager
+def deferred():
+    """Отключает пересчёт статистики по сигналам на время пакетных
+    операций; после них нужно вызвать ``rebuild`` для затронутых групп.
+    """
+    _state.deferred = True
+    try:
+        yield
+    finally:
+        _state.deferred = False
+
+
+def is_deferred():
+    return getattr(_state, 'deferred', False)
+
+
+def _refresh_top_authors(group_id):
+    usernames = GroupAuthorStats.objects.filter(
+        group_id=group_id
+    ).order_by('-post_count').values_list(
+        'author__username', flat=True
+    )[:TOP_AUTHORS]
+    GroupStats.objects.filter(pk=group_id).update(
+        top_authors=', '.join(usernames)
+    )
+
+
+def post_added(group_id, author_id, pub_date):
+    if group_id is None:
+        return
+    with transaction.atomic():
+        GroupStats.objects.get_or_create(group_id=group_id)
+        GroupStats.objects.filter(pk=group_id).update(
+            post_count=F('post_count') + 1
+        )
+        GroupStats.objects.filter(
+            Q(last_activity__isnull=True) | Q(last_activity__lt=pub_date),
+            pk=group_id
+        ).update(last_activity=pub_date)
+        updated = GroupAuthorStats.objects.filter(
+            group_id=group_id, author_id=author_id
+        ).update(post_count=F('post_count') + 1)
+        if not updated:
+            GroupAuthorStats.objects.create(
+                group_id=group_id, author_id=author_id, post_count=1
+            )
+        _refresh_top_authors(group_id)
+
+
+def post_removed(group_id, author_id):
+    if group_id is None:
+        return
+    with transaction.atomic():
+        GroupStats.objects.filter(pk=group_id, post_count__gt=0).update(
+            post_count=F('post_count') - 1
+        )
+        author_stats = GroupAuthorStats.objects.filter(
+            group_id=group_id, author_id=author_id
+        )
+        author_stats.filter(post_count__lte=1).delete()
+        author_stats.update(post_count=F('post_count') - 1)
+        GroupStats.objects.filter(pk=group_id).update(
+            last_activity=Subquery(
+                Post.objects.filter(group_id=group_id).order_by(
+                    '-pub_date'
+                ).values('pub_date')[:1]
+            )
+        )
+        _refresh_top_authors(group_id)
+
+
+def rebuild(group_ids=None):
+    groups = Group.objects.all()
+    if group_ids is not None:
+        groups = groups.filter(pk__in=group_ids)
+    for group in groups.annotate(
+        post_count=Count('posts'),
+        last_activity=Max('posts__pub_date')
+    ).iterator():
+        with transaction.atomic():
+            GroupStats.objects.update_or_create(
+                group=group,
+                defaults={
+                    'post_count': group.post_count,
+                    'last_activity': group.last_activity,
+                }
+            )
+            GroupAuthorStats.objects.filter(group=group).delete()
+            GroupAuthorStats.objects.bulk_create(
+                GroupAuthorStats(
+                    group=group,
+                    author_id=row['author'],
+                    post_count=row['post_count']
+                )
+                for row in Post.objects.filter(group=group).order_by().values(
+                    'author'
+                ).annotate(post_count=Count('pk'))
+            )
+            _refresh_top_authors(group.pk)
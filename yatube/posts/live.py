@@ -0,0 +1,234 @@
+"""Публикация новых постов и комментариев в открытые SSE-потоки.
+
+Брокер выбирается настройкой LIVE_BROKER. LocalBroker раздаёт события
+подписчикам внутри одного процесса. CacheBroker складывает события в
+общий кэш, и каждый процесс опрашивает его одним потоком: он заменяет
+внешний pub/sub, когда воркеров несколько.
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def index_channel():
+    return 'index'
+
+
+def group_channel(group_id):
+    return 'group:{}'.format(group_id)
+
+
+def author_channel(author_id):
+    return 'author:{}'.format(author_id)
+
+
+def post_channel(post_id):
+    return 'post:{}'.format(post_id)
+
+
+class LocalBroker:
+    def __init__(self):
+        self._ids = itertools.count(1)
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+
+    def publish(self, channels, event):
+        self._deliver(channels, dict(event, id=next(self._ids)))
+
+    def _deliver(self, channels, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            if subscription.channels & channels:
+                subscription.put(event)
+
+    def subscribe(self, channels):
+        subscription = LocalSubscription(self, channels)
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+class LocalSubscription:
+    def __init__(self, broker, channels):
+        self.broker = broker
+        self.channels = frozenset(channels)
+        self.queue = queue.Queue(settings.LIVE_QUEUE_SIZE)
+
+    def put(self, event):
+        # Медленный клиент теряет события, а не тормозит публикацию.
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            pass
+
+    def get(self, timeout):
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class CacheBroker(LocalBroker):
+    """Брокер для нескольких процессов поверх общего кэша.
+
+    Номер события занимается через cache.add, атомарный во всех
+    бэкендах, и событие пишется под этим номером. Ключ last_key только
+    подсказывает, с какого номера начинать. Подписки процесса
+    обслуживает один поток: раз в LIVE_POLL_INTERVAL он читает новые
+    события одним get_many и раздаёт их, как LocalBroker. Поток
+    работает, пока в процессе есть подписки.
+    """
+    last_key = 'live:last'
+    # Подсказку могут обогнать одновременные публикации.
+    lookahead = 16
+
+    def __init__(self):
+        super().__init__()
+        self._cursor = None
+        self._poller = None
+
+    def event_key(self, event_id):
+        return 'live:event:{}'.format(event_id)
+
+    def publish(self, channels, event):
+        event_id = cache.get(self.last_key, 0) + 1
+        while not cache.add(
+            self.event_key(event_id),
+            (sorted(channels), dict(event, id=event_id)),
+            settings.LIVE_EVENT_TTL
+        ):
+            event_id += 1
+        cache.set(self.last_key, event_id, None)
+
+    def subscribe(self, channels):
+        subscription = super().subscribe(channels)
+        with self._lock:
+            if self._cursor is None:
+                self._cursor = cache.get(self.last_key, 0)
+            if self._poller is None:
+                self._poller = threading.Thread(target=self._run, daemon=True)
+                self._poller.start()
+        return subscription
+
+    def _run(self):
+        while True:
+            time.sleep(settings.LIVE_POLL_INTERVAL)
+            with self._lock:
+                if not self._subscriptions:
+                    self._cursor = self._poller = None
+                    return
+            self.poll()
+
+    def poll(self):
+        """Раздаёт подписчикам процесса события после курсора."""
+        last = cache.get(self.last_key, 0)
+        cursor = max(self._cursor, last - settings.LIVE_QUEUE_SIZE)
+        ids = range(cursor + 1, max(cursor, last) + self.lookahead + 1)
+        found = cache.get_many([self.event_key(i) for i in ids])
+        for event_id in ids:
+            key = self.event_key(event_id)
+            if key in found:
+                channels, event = found[key]
+                self._deliver(frozenset(channels), event)
+            elif event_id > last:
+                break
+            # Номера до подсказки уже заняты: такое событие истекло.
+            cursor = event_id
+        self._cursor = cursor
+
+
+def broker():
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = import_string(settings.LIVE_BROKER)()
+        return _broker
+
+
+def reset():
+    global _broker
+    with _broker_lock:
+        _broker = None
+
+
+def post_created(post):
+    """Рассылает карточку нового поста в ленты, где он появится.
+
+    Карточка рендерится один раз на пост, а не для каждого подписчика.
+    """
+    channels = {index_channel(), author_channel(post.author_id)}
+    if post.group_id:
+        channels.add(group_channel(post.group_id))
+    broker().publish(channels, {
+        'type': 'post',
+        'data': {
+            'id': post.pk,
+            'html': render_to_string(
+                'includes/post_card.html', {'post': post}
+            ),
+        },
+    })
+
+
+def comment_created(comment):
+    broker().publish({post_channel(comment.post_id)}, {
+        'type': 'comment',
+        'data': {
+            'id': comment.pk,
+            'html': render_to_string(
+                'includes/comment.html', {'comment': comment}
+            ),
+        },
+    })
+
+
+def format_event(event):
+    return 'id: {}\nevent: {}\ndata: {}\n\n'.format(
+        event['id'], event['type'],
+        json.dumps(event['data'], ensure_ascii=False)
+    )
+
+
+def stream(channels):
+    """Генератор SSE-потока.
+
+    Пока клиент молчит, раз в LIVE_HEARTBEAT секунд отправляется
+    комментарий, чтобы прокси не закрыли соединение. Через
+    LIVE_MAX_DURATION поток завершается, и браузер переподключается
+    сам: так соединения не живут вечно и воркеры перезапускаются.
+    """
+    # Базе поток не нужен, и соединение не держится открытым до конца
+    # потока.
+    if not connection.in_atomic_block:
+        connection.close()
+    subscription = broker().subscribe(channels)
+    deadline = time.monotonic() + settings.LIVE_MAX_DURATION
+    try:
+        yield 'retry: {}\n\n'.format(settings.LIVE_RETRY_MS)
+        while time.monotonic() < deadline:
+            event = subscription.get(settings.LIVE_HEARTBEAT)
+            if event is None:
+                yield ': ping\n\n'
+            else:
+                yield format_event(event)
+    finally:
+        subscription.close()
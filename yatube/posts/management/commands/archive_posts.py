@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты и их комментарии в архивные таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.ARCHIVE_AFTER_DAYS,
+            help='Архивировать посты старше этого числа дней'
+        )
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        archived = archive.archive_old(
+            options['days'], options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'В архив перенесено постов: {posts}, комментариев: {comments}'
+            .format(**archived)
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов по графу подписок'
+
+    def handle(self, *args, **options):
+        count = recommendations.build()
+        self.stdout.write(
+            self.style.SUCCESS(f'Сохранено рекомендаций: {count}')
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import duplicates
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Ищет группы почти одинаковых постов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float)
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for title, model in (('Посты', Post), ('Комментарии', Comment)):
+            found = duplicates.clusters(
+                model.objects.all(),
+                options['threshold'],
+                options['batch_size']
+            )
+            self.stdout.write(
+                '{}: групп похожих записей {}'.format(title, len(found))
+            )
+            for cluster in found:
+                self.stdout.write(
+                    '  ' + ', '.join(str(pk) for pk in cluster)
+                )
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from posts import duplicates
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет из индекса дубликатов подписи старше окна '
+        'DUPLICATE_WINDOW_HOURS'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.SUCCESS('Удалено подписей: {}'.format(
+            duplicates.prune(options['batch_size'])
+        )))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает статистику групп по таблице постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('group_ids', nargs='*', type=int)
+
+    def handle(self, *args, **options):
+        group_stats.rebuild(options['group_ids'] or None)
+        self.stdout.write(self.style.SUCCESS('Статистика групп обновлена'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import excerpts
+from posts.models import ArchivedPost, Post
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает сохранённые отрывки и HTML постов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            updated = excerpts.rebuild(model, options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                '{}: обновлено {}'.format(
+                    model._meta.verbose_name_plural, updated
+                )
+            ))
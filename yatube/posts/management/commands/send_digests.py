@@ -0,0 +1,24 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import notifications
+
+
+class Command(BaseCommand):
+    help = 'Рассылает дайджесты непрочитанных уведомлений пачками писем'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=int, default=24,
+            help='За сколько последних часов искать получателей'
+        )
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        sent = notifications.send_digests(
+            timezone.now() - timedelta(hours=options['hours']),
+            options['batch_size']
+        )
+        self.stdout.write(self.style.SUCCESS(f'Отправлено писем: {sent}'))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from core import fields
+from core.models import TextDictionary
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = 'Обучает словарь сжатия на текстах постов и комментариев'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--samples', type=int, default=2000,
+            help='Сколько последних постов и комментариев взять в выборку'
+        )
+        parser.add_argument(
+            '--size', type=int, default=fields.DICTIONARY_SIZE,
+            help='Размер словаря в байтах'
+        )
+
+    def handle(self, *args, **options):
+        texts = list(Post.objects.order_by('-pk').values_list(
+            'text', flat=True
+        )[:options['samples']]) + list(Comment.objects.order_by(
+            '-pk'
+        ).values_list('text', flat=True)[:options['samples']])
+        data = fields.train_dictionary(texts, options['size'])
+        if not data:
+            self.stdout.write('Недостаточно текстов для словаря')
+            return
+        dictionary = TextDictionary.objects.create(
+            data=data, samples=len(texts)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            'Словарь {}: {} байт, текстов: {}'.format(
+                dictionary.pk, len(data), len(texts)
+            )
+        ))
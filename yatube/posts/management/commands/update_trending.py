@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рейтинг популярных постов'
+
+    def handle(self, *args, **options):
+        count = trending.update_ranks()
+        self.stdout.write(
+            self.style.SUCCESS(f'Рейтинг пересчитан для {count} постов')
+        )
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:14
+
+from django.db import migrations, models
+
+from posts.search import install_index, uninstall_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_author_recommendation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='pub_date',
+            field=models.DateTimeField(auto_now_add=True, db_index=True, help_text='Добавьте дату публикации', verbose_name='Дата публикации'),
+        ),
+        migrations.RunPython(install_index, uninstall_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:27
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('auth', '0011_update_proxy_permissions'),
+        ('posts', '0011_post_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationState',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='notification_state', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('read_until', models.PositiveIntegerField(default=0, verbose_name='Прочитано до события')),
+                ('digested_until', models.PositiveIntegerField(default=0, verbose_name='Отправлено в дайджесте до события')),
+            ],
+            options={
+                'verbose_name': 'Состояние уведомлений',
+                'verbose_name_plural': 'Состояния уведомлений',
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificationEvent',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Новый пост'), ('comment', 'Новый комментарий')], max_length=16, verbose_name='Тип')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата события')),
+                ('actor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to=settings.AUTH_USER_MODEL, verbose_name='Автор события')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='posts.Post', verbose_name='Пост')),
+                ('recipient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Событие уведомлений',
+                'verbose_name_plural': 'События уведомлений',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notificationevent',
+            index=models.Index(fields=['kind', 'actor'], name='notification_kind_actor_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0012_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostRevision',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Номер ревизии')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата ревизии')),
+                ('image', models.CharField(blank=True, max_length=100, verbose_name='Картинка')),
+                ('is_snapshot', models.BooleanField(default=False, verbose_name='Полный снимок')),
+                ('data', models.BinaryField(verbose_name='Данные')),
+                ('editor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='post_revisions', to=settings.AUTH_USER_MODEL, verbose_name='Редактор')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.Post', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Ревизия поста',
+                'verbose_name_plural': 'Ревизии постов',
+                'ordering': ('-number',),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postrevision',
+            constraint=models.UniqueConstraint(fields=('post', 'number'), name='unique_post_revision'),
+        ),
+    ]
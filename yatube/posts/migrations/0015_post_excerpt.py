@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:33
+
+from django.db import migrations, models
+
+from posts.excerpts import excerpt
+from posts.search import install_index, uninstall_index
+
+
+def fill_excerpts(apps, schema_editor):
+    for name in ('Post', 'ArchivedPost'):
+        model = apps.get_model('posts', name)
+        for post in model.objects.only('text').iterator():
+            model.objects.filter(pk=post.pk).update(
+                excerpt=excerpt(post.text)
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+        ('posts', '0014_archive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Отрывок'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.TextField(blank=True, editable=False, verbose_name='Отрывок'),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+        migrations.RunPython(install_index, uninstall_index),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:36
+
+from django.db import migrations, models
+
+from posts.excerpts import rebuild
+from posts.search import install_index, uninstall_index
+
+
+def fill_rendered_text(apps, schema_editor):
+    for name in ('Post', 'ArchivedPost'):
+        rebuild(apps.get_model('posts', name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_excerpt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedpost',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Отрывок в HTML'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='has_more',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст длиннее отрывка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='excerpt_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Отрывок в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='has_more',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Текст длиннее отрывка'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(fill_rendered_text, migrations.RunPython.noop),
+        migrations.RunPython(install_index, uninstall_index),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:37
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_post_rendered_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentSignature',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('post', 'Пост'), ('comment', 'Комментарий')], max_length=16, verbose_name='Тип')),
+                ('object_id', models.PositiveIntegerField(verbose_name='Номер записи')),
+                ('signature', models.BinaryField(verbose_name='Подпись')),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='Дата публикации')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='content_signatures', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('duplicate_of', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='posts.ContentSignature', verbose_name='Похожа на')),
+            ],
+            options={
+                'verbose_name': 'Подпись текста',
+                'verbose_name_plural': 'Подписи текстов',
+            },
+        ),
+        migrations.CreateModel(
+            name='ContentBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('band', models.PositiveSmallIntegerField(verbose_name='Полоса')),
+                ('bucket', models.BigIntegerField(verbose_name='Хеш полосы')),
+                ('signature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='buckets', to='posts.ContentSignature', verbose_name='Подпись')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='contentsignature',
+            constraint=models.UniqueConstraint(fields=('kind', 'object_id'), name='unique_content_signature'),
+        ),
+        migrations.AddIndex(
+            model_name='contentbucket',
+            index=models.Index(fields=['band', 'bucket'], name='content_bucket_lookup_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:01
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0018_unique_follow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationevent',
+            name='archived_post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='posts.ArchivedPost', verbose_name='Архивный пост'),
+        ),
+        migrations.AddField(
+            model_name='postrevision',
+            name='archived_post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.ArchivedPost', verbose_name='Архивный пост'),
+        ),
+        migrations.AlterField(
+            model_name='notificationevent',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notification_events', to='posts.Post', verbose_name='Пост'),
+        ),
+        migrations.AlterField(
+            model_name='postrevision',
+            name='post',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='posts.Post', verbose_name='Пост'),
+        ),
+        migrations.AddConstraint(
+            model_name='postrevision',
+            constraint=models.UniqueConstraint(fields=('archived_post', 'number'), name='unique_archived_post_revision'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:03
+
+import core.fields
+from django.db import migrations
+
+from posts.excerpts import rebuild
+from posts.search import install_index, uninstall_index
+
+
+def compress_rendered_text(apps, schema_editor):
+    rebuild(apps.get_model('posts', 'Post'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_archived_post_history'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='text_html',
+            field=core.fields.CompressedTextField(blank=True, default='', verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(compress_rendered_text, migrations.RunPython.noop),
+        migrations.RunPython(install_index, uninstall_index),
+    ]
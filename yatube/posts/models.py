@@ -1,9 +1,105 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+
+from core.fields import CompressedTextField
+from posts import excerpts
 
 User = get_user_model()
 
 
+class HotArchiveSequence:
+    """Посты из рабочей таблицы, за которыми идут посты из архива.
+
+    В архив уходят только посты старше всех рабочих, поэтому при
+    сортировке по убыванию даты последовательность остаётся
+    упорядоченной. Поддерживает count() и срезы, как нужно Paginator.
+    """
+
+    def __init__(self, hot, archive):
+        self.hot = hot
+        self.archive = archive
+        self._counts = None
+
+    def select_related(self, *fields):
+        return HotArchiveSequence(
+            self.hot.select_related(*fields),
+            self.archive.select_related(*fields)
+        )
+
+    def defer(self, *fields):
+        """Поля, которых нет в архиве, откладываются только у рабочих."""
+        archived = {
+            field.name for field in self.archive.model._meta.concrete_fields
+        }
+        return HotArchiveSequence(
+            self.hot.defer(*fields),
+            self.archive.defer(*(name for name in fields if name in archived))
+        )
+
+    def counts(self):
+        if self._counts is None:
+            self._counts = (self.hot.count(), self.archive.count())
+        return self._counts
+
+    def count(self):
+        return sum(self.counts())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop, _ = index.indices(self.count())
+        hot_count = self.counts()[0]
+        result = []
+        if start < hot_count:
+            result.extend(self.hot[start:min(stop, hot_count)])
+        if stop > hot_count:
+            result.extend(self.archive[
+                max(start - hot_count, 0):stop - hot_count
+            ])
+        return result
+
+
+class PostQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """Вместе с текстом обновляет сохранённые отрывок и HTML."""
+        if 'text' not in kwargs:
+            return super().update(**kwargs)
+        if isinstance(kwargs['text'], str):
+            post = self.model(text=kwargs['text'])
+            excerpts.fill(post)
+            return super().update(**kwargs, **{
+                name: getattr(post, name) for name in excerpts.FIELDS
+            })
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list('pk', flat=True))
+            updated = super().update(**kwargs)
+            excerpts.rebuild(
+                self.model, queryset=self.model.objects.filter(pk__in=pks)
+            )
+        return updated
+
+
+class PostManager(models.Manager.from_queryset(PostQuerySet)):
+    def including_archive(self, **filters):
+        return HotArchiveSequence(
+            self.filter(**filters), ArchivedPost.objects.filter(**filters)
+        )
+
+    def get_with_archive(self, queryset=None, archive=None, **lookup):
+        """Ищет пост в рабочей таблице, а если его там нет — в архиве."""
+        if queryset is None:
+            queryset = self.get_queryset()
+        if archive is None:
+            archive = ArchivedPost.objects.select_related('author', 'group')
+        try:
+            return queryset.get(**lookup)
+        except self.model.DoesNotExist:
+            return archive.get(**lookup)
+
+
 class Group(models.Model):
     title = models.CharField(
         max_length=200,
@@ -29,9 +125,21 @@ class Post(models.Model):
         verbose_name='Текст поста',
         help_text='Введите текст поста'
     )
+    excerpt = models.TextField('Отрывок', blank=True, editable=False)
+    excerpt_html = models.TextField(
+        'Отрывок в HTML', blank=True, editable=False
+    )
+    # Полный HTML нужен только странице поста: ленты его не читают.
+    text_html = CompressedTextField(
+        'Текст в HTML', blank=True, default='', editable=False
+    )
+    has_more = models.BooleanField(
+        'Текст длиннее отрывка', default=False, editable=False
+    )
     pub_date = models.DateTimeField(
         'Дата публикации',
         auto_now_add=True,
+        db_index=True,
         help_text='Добавьте дату публикации'
     )
     author = models.ForeignKey(
@@ -56,6 +164,10 @@ class Post(models.Model):
         blank=True
     )
 
+    is_archived = False
+
+    objects = PostManager()
+
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Пост'
@@ -64,6 +176,15 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        excerpts.fill(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'text' in update_fields:
+            kwargs['update_fields'] = (
+                set(update_fields) | set(excerpts.FIELDS)
+            )
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -96,3 +217,405 @@ class Follow(models.Model):
         related_name='following',
         on_delete=models.CASCADE
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_follow'
+            ),
+        ]
+
+
+class GroupStats(models.Model):
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    post_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0
+    )
+    last_activity = models.DateTimeField(
+        'Последняя активность',
+        blank=True,
+        null=True
+    )
+    top_authors = models.CharField(
+        'Самые активные авторы',
+        max_length=255,
+        blank=True
+    )
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self):
+        return f'{self.group}: {self.post_count}'
+
+
+class GroupAuthorStats(models.Model):
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='author_stats',
+        verbose_name='Группа'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='group_stats',
+        verbose_name='Автор'
+    )
+    post_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0
+    )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=('group', 'author'),
+                name='unique_group_author_stats'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('group', '-post_count'),
+                name='group_author_stats_top_idx'
+            ),
+        ]
+
+
+class PostRank(models.Model):
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rank',
+        verbose_name='Пост'
+    )
+    score = models.FloatField('Рейтинг', db_index=True)
+    updated = models.DateTimeField('Дата расчёта', auto_now=True)
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.3f}'
+
+
+class AuthorRecommendation(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommendations',
+        verbose_name='Пользователь'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='recommended_to',
+        verbose_name='Рекомендуемый автор'
+    )
+    score = models.FloatField('Вес рекомендации')
+
+    class Meta:
+        ordering = ('-score',)
+        verbose_name = 'Рекомендация автора'
+        verbose_name_plural = 'Рекомендации авторов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'author'),
+                name='unique_author_recommendation'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-score'),
+                name='recommendation_user_top_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.author_id}: {self.score:.3f}'
+
+
+class NotificationEvent(models.Model):
+    """Запись журнала событий, из которого собираются уведомления.
+
+    Событие пишется один раз, а не для каждого подписчика: получатели
+    нового поста вычисляются при чтении по подпискам.
+    """
+    POST = 'post'
+    COMMENT = 'comment'
+    KIND_CHOICES = (
+        (POST, 'Новый пост'),
+        (COMMENT, 'Новый комментарий'),
+    )
+
+    kind = models.CharField('Тип', max_length=16, choices=KIND_CHOICES)
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notification_events',
+        verbose_name='Автор события'
+    )
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='notification_events',
+        verbose_name='Пост'
+    )
+    archived_post = models.ForeignKey(
+        'ArchivedPost',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='notification_events',
+        verbose_name='Архивный пост'
+    )
+    created = models.DateTimeField('Дата события', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Событие уведомлений'
+        verbose_name_plural = 'События уведомлений'
+        indexes = [
+            models.Index(
+                fields=('kind', 'actor'),
+                name='notification_kind_actor_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.actor_id} -> {self.post_id}'
+
+    @property
+    def any_post(self):
+        return self.post or self.archived_post
+
+
+class NotificationState(models.Model):
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_state',
+        verbose_name='Пользователь'
+    )
+    read_until = models.PositiveIntegerField(
+        'Прочитано до события', default=0
+    )
+    digested_until = models.PositiveIntegerField(
+        'Отправлено в дайджесте до события', default=0
+    )
+
+    class Meta:
+        verbose_name = 'Состояние уведомлений'
+        verbose_name_plural = 'Состояния уведомлений'
+
+    def __str__(self):
+        return f'{self.user_id}: {self.read_until}'
+
+
+class PostRevision(models.Model):
+    """Ревизия поста: полный снимок текста или сжатый дифф к предыдущей."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='revisions',
+        verbose_name='Пост'
+    )
+    archived_post = models.ForeignKey(
+        'ArchivedPost',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='revisions',
+        verbose_name='Архивный пост'
+    )
+    number = models.PositiveIntegerField('Номер ревизии')
+    editor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='post_revisions',
+        verbose_name='Редактор'
+    )
+    created = models.DateTimeField('Дата ревизии', auto_now_add=True)
+    image = models.CharField('Картинка', max_length=100, blank=True)
+    is_snapshot = models.BooleanField('Полный снимок', default=False)
+    data = models.BinaryField('Данные')
+
+    class Meta:
+        ordering = ('-number',)
+        verbose_name = 'Ревизия поста'
+        verbose_name_plural = 'Ревизии постов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('post', 'number'),
+                name='unique_post_revision'
+            ),
+            models.UniqueConstraint(
+                fields=('archived_post', 'number'),
+                name='unique_archived_post_revision'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} #{self.number}'
+
+
+class ArchivedPost(models.Model):
+    """Пост, перенесённый из рабочей таблицы в архив. Только для чтения."""
+    id = models.IntegerField(primary_key=True)
+    text = CompressedTextField('Текст поста')
+    excerpt = models.TextField('Отрывок', blank=True, editable=False)
+    excerpt_html = models.TextField(
+        'Отрывок в HTML', blank=True, editable=False
+    )
+    has_more = models.BooleanField(
+        'Текст длиннее отрывка', default=False, editable=False
+    )
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.CharField('Картинка', max_length=100, blank=True)
+    archived = models.DateTimeField('Дата архивации', auto_now_add=True)
+
+    is_archived = True
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self):
+        return self.text[:15]
+
+    @property
+    def text_html(self):
+        # Готовый HTML архив не хранит: он занял бы больше места, чем
+        # сжатый текст, а архивные посты открывают редко.
+        return excerpts.render(self.text)
+
+
+class ArchivedComment(models.Model):
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = CompressedTextField('Текст комментария')
+    created = models.DateTimeField('Дата комментария')
+
+    class Meta:
+        ordering = ('created',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self):
+        return self.text
+
+
+class ContentSignature(models.Model):
+    """MinHash-подпись недавно опубликованного поста или комментария."""
+    POST = 'post'
+    COMMENT = 'comment'
+    KIND_CHOICES = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField('Тип', max_length=16, choices=KIND_CHOICES)
+    object_id = models.PositiveIntegerField('Номер записи')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='content_signatures',
+        verbose_name='Автор'
+    )
+    signature = models.BinaryField('Подпись')
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='duplicates',
+        verbose_name='Похожа на'
+    )
+    created = models.DateTimeField(
+        'Дата публикации', auto_now_add=True, db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'Подпись текста'
+        verbose_name_plural = 'Подписи текстов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('kind', 'object_id'),
+                name='unique_content_signature'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class ContentBucket(models.Model):
+    """Корзина LSH: хеш одной полосы подписи."""
+    signature = models.ForeignKey(
+        ContentSignature,
+        on_delete=models.CASCADE,
+        related_name='buckets',
+        verbose_name='Подпись'
+    )
+    band = models.PositiveSmallIntegerField('Полоса')
+    bucket = models.BigIntegerField('Хеш полосы')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=('band', 'bucket'),
+                name='content_bucket_lookup_idx'
+            ),
+        ]
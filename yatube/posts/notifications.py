@@ -0,0 +1,236 @@
+"""Уведомления о новых постах подписок и комментариях к своим постам.
+
+Каждое событие пишется в журнал ``NotificationEvent`` одной строкой,
+без копии на каждого подписчика. Список уведомлений собирается при
+открытии страницы: однотипные события склеиваются в одно уведомление
+(«5 новых комментариев к посту»). Счётчик непрочитанного хранится в
+кэше кортежем (версия получателя, последнее учтённое событие, число)
+и досчитывается только по событиям, появившимся после него.
+"""
+import uuid
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core.batch import pk_batches
+from posts import follow_graph
+from posts.models import (Follow, NotificationEvent, NotificationState, Post,
+                          User)
+
+VERSION_KEY = 'notifications:version:{}'
+UNREAD_KEY = 'notifications:unread:{}'
+
+Notification = namedtuple(
+    'Notification', 'kind count actor post last_id created unread'
+)
+
+
+def _touch(user_ids):
+    version = uuid.uuid4().hex
+    cache.set_many({
+        VERSION_KEY.format(user_id): version for user_id in user_ids
+    }, None)
+
+
+def _recipients(event):
+    if event.recipient_id is not None:
+        return [event.recipient_id]
+    return list(Follow.objects.filter(author_id=event.actor_id).values_list(
+        'user', flat=True
+    ))
+
+
+def record(kind, actor_id, post_id, recipient_id=None):
+    event = NotificationEvent.objects.create(
+        kind=kind,
+        actor_id=actor_id,
+        post_id=post_id,
+        recipient_id=recipient_id
+    )
+    # Версия своя у каждого получателя, и чужие события не сбрасывают
+    # его счётчик. Она меняется сразу и ещё раз после коммита:
+    # счётчик, пересчитанный до коммита, не увидел бы новую строку.
+    recipients = _recipients(event)
+    _touch(recipients)
+    transaction.on_commit(lambda: _touch(recipients))
+    return event
+
+
+def events_for(user):
+    return NotificationEvent.objects.filter(
+        Q(recipient=user) | Q(
+            kind=NotificationEvent.POST,
+            actor__in=list(follow_graph.authors(user.pk))
+        )
+    )
+
+
+def get_state(user):
+    return NotificationState.objects.get_or_create(user=user)[0]
+
+
+def read_until(user):
+    return NotificationState.objects.filter(user=user).values_list(
+        'read_until', flat=True
+    ).first() or 0
+
+
+def unread_count(user):
+    key = UNREAD_KEY.format(user.pk)
+    version_key = VERSION_KEY.format(user.pk)
+    found = cache.get_many([key, version_key])
+    version = found.get(version_key)
+    if version is None:
+        cache.add(version_key, uuid.uuid4().hex, None)
+        version = cache.get(version_key)
+    cached = found.get(key)
+    if cached is not None and cached[0] == version:
+        return cached[2]
+    if cached is None:
+        cursor, count = read_until(user), 0
+    else:
+        cursor, count = cached[1], cached[2]
+    new = events_for(user).filter(id__gt=cursor).aggregate(
+        count=Count('id'), last=Max('id')
+    )
+    if new['count']:
+        cursor, count = new['last'], count + new['count']
+    cache.set(
+        key, (version, cursor, count), settings.NOTIFICATIONS_CACHE_TTL
+    )
+    return count
+
+
+def coalesce(user, after=0, limit=None):
+    """Склеенные уведомления пользователя, начиная с самых свежих.
+
+    Комментарии группируются по посту, новые посты — по автору.
+    Учитываются события после after и не старше окна
+    NOTIFICATIONS_WINDOW_DAYS.
+    """
+    limit = limit or settings.NOTIFICATIONS_SIZE
+    events = events_for(user).filter(
+        id__gt=after,
+        created__gte=timezone.now() - timedelta(
+            days=settings.NOTIFICATIONS_WINDOW_DAYS
+        )
+    ).order_by()
+    totals = {
+        'count': Count('id'),
+        'last_id': Max('id'),
+        'created': Max('created'),
+    }
+    groups = [
+        (NotificationEvent.COMMENT, row)
+        for row in events.filter(
+            recipient=user, kind=NotificationEvent.COMMENT
+        ).values('post', 'archived_post').annotate(**totals).order_by(
+            '-last_id'
+        )[:limit]
+    ] + [
+        (NotificationEvent.POST, row)
+        for row in events.filter(
+            kind=NotificationEvent.POST
+        ).values('actor').annotate(**totals).order_by('-last_id')[:limit]
+    ]
+    groups.sort(key=lambda group: -group[1]['last_id'])
+    groups = groups[:limit]
+    last_events = NotificationEvent.objects.select_related(
+        'actor', 'post', 'archived_post'
+    ).defer('post__text', 'archived_post__text').in_bulk(
+        [row['last_id'] for _, row in groups]
+    )
+    seen = read_until(user)
+    return [
+        Notification(
+            kind=kind,
+            count=row['count'],
+            actor=last_events[row['last_id']].actor,
+            post=last_events[row['last_id']].any_post,
+            last_id=row['last_id'],
+            created=row['created'],
+            unread=row['last_id'] > seen,
+        )
+        for kind, row in groups
+    ]
+
+
+def mark_read(user, notifications):
+    if not notifications:
+        return
+    last_id = max(notification.last_id for notification in notifications)
+    get_state(user)
+    NotificationState.objects.filter(
+        user=user, read_until__lt=last_id
+    ).update(read_until=last_id)
+    cache.delete(UNREAD_KEY.format(user.pk))
+
+
+def digest_candidates(since):
+    """Пользователи с почтой, у которых с момента since были события."""
+    events = NotificationEvent.objects.filter(created__gte=since)
+    recipients = events.exclude(recipient=None).values('recipient')
+    followers = Follow.objects.filter(
+        author__in=events.filter(
+            kind=NotificationEvent.POST
+        ).values('actor')
+    ).values('user')
+    return User.objects.exclude(email='').filter(
+        Q(pk__in=recipients) | Q(pk__in=followers)
+    )
+
+
+def send_digests(since, batch_size=None):
+    """Рассылает дайджесты пачками через одно соединение EMAIL_BACKEND.
+
+    Возвращает число отправленных писем.
+    """
+    batch_size = batch_size or settings.NOTIFICATIONS_DIGEST_BATCH
+    sent = 0
+    connection = get_connection()
+    for pks in pk_batches(digest_candidates(since), batch_size):
+        messages, digested = [], {}
+        for user in User.objects.filter(pk__in=pks):
+            state = get_state(user)
+            notifications = coalesce(
+                user, after=max(state.read_until, state.digested_until)
+            )
+            if not notifications:
+                continue
+            messages.append(EmailMessage(
+                subject='Новые уведомления Yatube',
+                body=render_to_string('posts/notifications_digest.txt', {
+                    'user': user, 'notifications': notifications
+                }),
+                to=[user.email],
+            ))
+            digested[user.pk] = max(n.last_id for n in notifications)
+        if messages:
+            sent += connection.send_messages(messages) or 0
+        for user_id, last_id in digested.items():
+            NotificationState.objects.filter(user_id=user_id).update(
+                digested_until=last_id
+            )
+    return sent
+
+
+def post_created(post):
+    record(NotificationEvent.POST, post.author_id, post.pk)
+
+
+def comment_created(comment):
+    author_id = Post.objects.filter(pk=comment.post_id).values_list(
+        'author', flat=True
+    ).get()
+    if author_id != comment.author_id:
+        record(
+            NotificationEvent.COMMENT, comment.author_id, comment.post_id,
+            recipient_id=author_id
+        )
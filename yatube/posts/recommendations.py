@@ -0,0 +1,115 @@
+"""Рекомендации авторов по графу подписок.
+
+Пользователи обрабатываются частями по RECOMMENDATIONS_BATCH. Для части
+читаются только нужные ей списки смежности, и у каждого списка
+ограничена длина: у пользователя берутся RECOMMENDATIONS_MAX_FOLLOWING
+последних подписок, у автора — RECOMMENDATIONS_MAX_NEIGHBOURS последних
+подписчиков. Поэтому в памяти одновременно не больше
+BATCH * MAX_FOLLOWING * MAX_NEIGHBOURS * MAX_FOLLOWING рёбер, сколько бы
+их ни было в графе.
+"""
+import heapq
+import math
+from array import array
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+
+from core.batch import pk_batches
+from posts.models import AuthorRecommendation, Follow, User
+
+FRIEND_OF_FRIEND_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.5
+# Столько id помещается в один запрос с IN даже в SQLite.
+QUERY_IDS = 500
+
+
+def _adjacency(field, other, ids, limit, chunk_size=10000):
+    """Первые limit соседей каждого из ids, начиная с новых подписок.
+
+    Возвращает массивы соседей и полное число соседей у каждого id.
+    """
+    ids = sorted(ids)
+    neighbours, totals = {}, defaultdict(int)
+    for start in range(0, len(ids), QUERY_IDS):
+        for key, value in Follow.objects.filter(**{
+            field + '__in': ids[start:start + QUERY_IDS]
+        }).order_by(field, '-id').values_list(field, other).iterator(
+            chunk_size=chunk_size
+        ):
+            totals[key] += 1
+            if totals[key] <= limit:
+                neighbours.setdefault(key, array('l')).append(value)
+    return neighbours, totals
+
+
+def load_partition(users):
+    """Списки смежности, которых достаточно для рекомендаций users."""
+    following = _adjacency(
+        'user', 'author', users, settings.RECOMMENDATIONS_MAX_FOLLOWING
+    )[0]
+    authors = set().union(*following.values())
+    followers, popularity = _adjacency(
+        'author', 'user', authors, settings.RECOMMENDATIONS_MAX_NEIGHBOURS
+    )
+    others = authors.union(*followers.values()).difference(following)
+    following.update(_adjacency(
+        'user', 'author', others, settings.RECOMMENDATIONS_MAX_FOLLOWING
+    )[0])
+    return following, followers, popularity
+
+
+def recommend(user, following, followers, popularity):
+    followed = following.get(user, ())
+    scores = defaultdict(float)
+    for author in followed:
+        for candidate in following.get(author, ()):
+            scores[candidate] += FRIEND_OF_FRIEND_WEIGHT
+        weight = CO_FOLLOW_WEIGHT / math.log(2 + popularity.get(author, 0))
+        for neighbour in followers.get(author, ()):
+            if neighbour == user:
+                continue
+            for candidate in following.get(neighbour, ()):
+                scores[candidate] += weight
+    exclude = set(followed)
+    exclude.add(user)
+    return heapq.nlargest(
+        settings.RECOMMENDATIONS_SIZE,
+        ((score, author) for author, score in scores.items()
+         if author not in exclude)
+    )
+
+
+def _write(users, rows):
+    with transaction.atomic():
+        AuthorRecommendation.objects.filter(user__in=users).delete()
+        AuthorRecommendation.objects.bulk_create(rows)
+
+
+def build():
+    total = 0
+    for users in pk_batches(
+        User.objects.filter(pk__in=Follow.objects.values('user')),
+        settings.RECOMMENDATIONS_BATCH
+    ):
+        following, followers, popularity = load_partition(users)
+        rows = [
+            AuthorRecommendation(user_id=user, author_id=author, score=score)
+            for user in users
+            for score, author in recommend(
+                user, following, followers, popularity
+            )
+        ]
+        _write(users, rows)
+        total += len(rows)
+    AuthorRecommendation.objects.exclude(
+        user__in=Follow.objects.values('user')
+    ).delete()
+    return total
+
+
+def for_user(user):
+    return AuthorRecommendation.objects.filter(user=user).exclude(
+        author__following__user=user
+    ).select_related('author')[:settings.RECOMMENDATIONS_SHOWN]
@@ -0,0 +1,110 @@
+"""История правок постов.
+
+Первая ревизия и каждая REVISIONS_SNAPSHOT_EVERY-я хранятся полным
+снимком, остальные — диффом к предыдущей ревизии по словам. Данные
+сжаты zlib. Чтобы восстановить ревизию, нужно применить к ближайшему
+снимку не больше REVISIONS_SNAPSHOT_EVERY - 1 диффов.
+"""
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db import transaction
+
+from posts.models import PostRevision
+
+TOKEN = re.compile(r'\S+|\s+')
+
+
+def make_diff(old, new):
+    """Дифф в виде списка операций.
+
+    Пара [i, j] означает «взять токены i..j старого текста», строка —
+    «вставить этот текст».
+    """
+    old_tokens, new_tokens = TOKEN.findall(old), TOKEN.findall(new)
+    ops = []
+    matcher = SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif j2 > j1:
+            ops.append(''.join(new_tokens[j1:j2]))
+    return ops
+
+
+def apply_diff(old, ops):
+    old_tokens = TOKEN.findall(old)
+    return ''.join(
+        ''.join(old_tokens[op[0]:op[1]]) if isinstance(op, list) else op
+        for op in ops
+    )
+
+
+def encode(value):
+    return zlib.compress(
+        json.dumps(value, ensure_ascii=False).encode(), 9
+    )
+
+
+def decode(data):
+    return json.loads(zlib.decompress(bytes(data)).decode())
+
+
+def _create(post_id, number, editor_id, state, base):
+    """Ревизия с текстом и картинкой state; дифф считается к base."""
+    is_snapshot = (
+        base is None
+        or (number - 1) % settings.REVISIONS_SNAPSHOT_EVERY == 0
+    )
+    return PostRevision.objects.create(
+        post_id=post_id,
+        number=number,
+        editor_id=editor_id,
+        image=state[1],
+        is_snapshot=is_snapshot,
+        data=encode(state[0] if is_snapshot else make_diff(base, state[0]))
+    )
+
+
+def record(post_id, editor_id, previous, current):
+    """Сохраняет правку поста; previous и current — пары (текст, картинка).
+
+    Вызывается из transaction.on_commit, а не внутри запроса на правку.
+    Дифф считается к последней сохранённой ревизии. Если previous с ней
+    не совпадает (пост меняли в обход истории или параллельно), сначала
+    сохраняется previous без редактора.
+    """
+    with transaction.atomic():
+        last = PostRevision.objects.filter(post_id=post_id).values_list(
+            'number', 'image'
+        ).order_by('-number').first()
+        if last is None:
+            number, base = 0, None
+        else:
+            number, base = last[0], (text_at(post_id, last[0]), last[1])
+        if base != tuple(previous):
+            number += 1
+            _create(
+                post_id, number, None, previous, base and base[0]
+            )
+            base = tuple(previous)
+        return _create(post_id, number + 1, editor_id, current, base[0])
+
+
+def text_at(post_id, number):
+    revisions = PostRevision.objects.filter(post_id=post_id)
+    snapshot = revisions.filter(
+        is_snapshot=True, number__lte=number
+    ).values_list('number', flat=True).order_by('-number').first()
+    if snapshot is None:
+        raise PostRevision.DoesNotExist
+    text = None
+    for is_snapshot, data in revisions.filter(
+        number__gte=snapshot, number__lte=number
+    ).order_by('number').values_list('is_snapshot', 'data'):
+        value = decode(data)
+        text = value if is_snapshot else apply_diff(text, value)
+    return text
@@ -0,0 +1,69 @@
+from django.db import connection
+
+FTS_TABLE = 'posts_post_fts'
+
+INSTALL_SQL = (
+    f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+    "text, content='posts_post', content_rowid='id')",
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON posts_post BEGIN '
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END',
+    f'CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON posts_post BEGIN '
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    f'CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE ON posts_post BEGIN '
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    f'INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END',
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+UNINSTALL_SQL = (
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+)
+
+
+def install_index(apps, schema_editor):
+    """Создаёт полнотекстовый индекс постов и триггеры его обновления.
+
+    SQLite пересоздаёт таблицу при изменении её полей, и триггеры
+    при этом теряются, поэтому миграции, меняющие ``posts_post``,
+    должны вызывать эту функцию повторно.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in INSTALL_SQL:
+        schema_editor.execute(statement)
+
+
+def uninstall_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in UNINSTALL_SQL:
+        schema_editor.execute(statement)
+
+
+def is_available():
+    return connection.vendor == 'sqlite'
+
+
+def match_query(search_term):
+    return ' '.join(
+        '"{}"*'.format(word.replace('"', '""'))
+        for word in search_term.split()
+    )
+
+
+def filter_posts(queryset, search_term):
+    return queryset.extra(
+        where=[
+            f'posts_post.id IN (SELECT rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s)'
+        ],
+        params=[match_query(search_term)]
+    )
@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from posts import duplicates, follow_graph, group_stats, live, notifications
+from posts.models import (Comment, ContentSignature, Follow, Group,
+                          GroupStats, Post)
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._stored_group_id = instance.__dict__.get('group_id')
+
+
+@receiver(post_save, sender=Post)
+def update_group_stats_on_save(sender, instance, created, **kwargs):
+    stored_group_id = instance._stored_group_id
+    instance._stored_group_id = instance.group_id
+    if group_stats.is_deferred():
+        return
+    if created:
+        group_stats.post_added(
+            instance.group_id, instance.author_id, instance.pub_date
+        )
+    elif stored_group_id != instance.group_id:
+        group_stats.post_removed(stored_group_id, instance.author_id)
+        group_stats.post_added(
+            instance.group_id, instance.author_id, instance.pub_date
+        )
+
+
+@receiver(post_save, sender=Post)
+def publish_new_post(sender, instance, created, **kwargs):
+    if created:
+        notifications.post_created(instance)
+        transaction.on_commit(lambda: live.post_created(instance))
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, **kwargs):
+    if created:
+        notifications.comment_created(instance)
+        transaction.on_commit(lambda: live.comment_created(instance))
+
+
+@receiver(post_delete, sender=Post)
+def update_group_stats_on_delete(sender, instance, **kwargs):
+    if not group_stats.is_deferred():
+        group_stats.post_removed(instance.group_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def forget_post_signature(sender, instance, **kwargs):
+    duplicates.forget(ContentSignature.POST, [instance.pk])
+
+
+@receiver(post_delete, sender=Comment)
+def forget_comment_signature(sender, instance, **kwargs):
+    duplicates.forget(ContentSignature.COMMENT, [instance.pk])
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    follow_graph.invalidate(instance.user_id)
@@ -0,0 +1,169 @@
+from http import HTTPStatus
+
+from django.db.models.signals import post_delete
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import follow_graph
+from posts.models import (Comment, Follow, Group, GroupStats, Post,
+                          PostRank, User)
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for text in ('Котики и собаки', 'Новости спорта', 'Котлеты'):
+            Post.objects.create(author=cls.admin, text=text, group=cls.group)
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def changelist(self, **params):
+        return self.admin_client.get(
+            reverse('admin:posts_post_changelist'), params
+        )
+
+    def test_changelist_does_not_render_group_choices(self):
+        unused_group = Group.objects.create(
+            title='Пустая группа',
+            slug='empty-slug',
+            description='Тестовое описание',
+        )
+        response = self.changelist()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotContains(response, '<option value="{}"'.format(
+            unused_group.pk
+        ))
+
+    def test_search_uses_full_text_index(self):
+        response = self.changelist(q='кот')
+        self.assertEqual(
+            {post.text for post in response.context['cl'].result_list},
+            {'Котики и собаки', 'Котлеты'}
+        )
+
+    def test_search_index_follows_updates(self):
+        Post.objects.filter(text='Новости спорта').update(text='Котёнок')
+        Post.objects.filter(text='Котлеты').delete()
+        response = self.changelist(q='кот')
+        self.assertEqual(
+            {post.text for post in response.context['cl'].result_list},
+            {'Котики и собаки', 'Котёнок'}
+        )
+
+    @override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=1)
+    def test_large_tables_use_estimated_count(self):
+        Post.objects.filter(text='Котики и собаки').delete()
+        response = self.changelist()
+        self.assertEqual(response.context['cl'].result_count, 3)
+        response = self.changelist(q='кот')
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+
+@override_settings(ADMIN_BATCH_SIZE=2)
+class AdminActionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='admin'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_second = Group.objects.create(
+            title='Вторая группа',
+            slug='test-slug-2',
+            description='Тестовое описание 2',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.admin, text='Текст' + str(i), group=cls.group
+            )
+            for i in range(5)
+        ]
+        for post in cls.posts:
+            Comment.objects.create(post=post, author=cls.spammer, text='Спам')
+
+    def setUp(self):
+        self.admin_client = Client()
+        self.admin_client.force_login(self.admin)
+
+    def run_action(self, model, action, objects, **data):
+        return self.admin_client.post(
+            reverse(f'admin:posts_{model}_changelist'),
+            {
+                'action': action,
+                '_selected_action': [obj.pk for obj in objects],
+                **data
+            },
+            follow=True
+        )
+
+    def test_move_to_group(self):
+        response = self.run_action(
+            'post', 'move_to_group', self.posts[:3],
+            group=self.group_second.pk
+        )
+        self.assertContains(response, 'Перенесено постов: 3 (пакетов: 2)')
+        self.assertEqual(self.group_second.posts.count(), 3)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group_second).post_count, 3
+        )
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 2
+        )
+
+    def test_delete_posts_in_batches(self):
+        response = self.run_action(
+            'post', 'delete_posts_in_batches', self.posts[:3]
+        )
+        self.assertContains(
+            response, 'Удалено постов: 3, комментариев: 3 (пакетов: 2)'
+        )
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(Comment.objects.count(), 2)
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 2
+        )
+
+    def test_purge_author_comments(self):
+        comment = Comment.objects.filter(author=self.spammer).first()
+        response = self.run_action(
+            'comment', 'purge_author_comments', [comment]
+        )
+        self.assertContains(response, 'Удалено комментариев: 5')
+        self.assertFalse(Comment.objects.exists())
+
+    def test_batch_delete_cascades_without_loading_rows(self):
+        PostRank.objects.create(post=self.posts[0], score=1)
+        deleted = []
+
+        def receiver(instance, **kwargs):
+            deleted.append(instance.pk)
+
+        post_delete.connect(receiver, sender=Post)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Post)
+        self.run_action('post', 'delete_posts_in_batches', self.posts[:3])
+        self.assertEqual(deleted, [])
+        self.assertFalse(PostRank.objects.exists())
+
+    def test_remove_follows(self):
+        follow = Follow.objects.create(user=self.spammer, author=self.admin)
+        self.assertEqual(
+            list(follow_graph.authors(self.spammer.pk)), [self.admin.pk]
+        )
+        self.run_action('follow', 'remove_follows', [follow])
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(list(follow_graph.authors(self.spammer.pk)), [])
@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import archive, excerpts, notifications, revisions
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Group,
+                          GroupStats, NotificationEvent, Post, PostRank,
+                          User)
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        now = timezone.now()
+        cls.posts = []
+        for i in range(12):
+            post = Post.objects.create(
+                author=cls.author, group=cls.group, text='Пост ' + str(i)
+            )
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(days=1000 - i * 100)
+            )
+            cls.posts.append(post)
+        cls.old_post = cls.posts[0]
+        cls.comment = Comment.objects.create(
+            post=cls.old_post, author=cls.reader, text='Старый комментарий'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_old_posts_move_to_archive(self):
+        archived = archive.archive_old(days=730, batch_size=2)
+        self.assertEqual(archived, {'posts': 3, 'comments': 1})
+        self.assertFalse(Post.objects.filter(pk=self.old_post.pk).exists())
+        archived_post = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived_post.text, 'Пост 0')
+        self.assertEqual(
+            ArchivedComment.objects.get(pk=self.comment.pk).post,
+            archived_post
+        )
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 9
+        )
+
+    def test_batch_reads_inside_its_transaction(self):
+        with CaptureQueriesContext(connection) as context:
+            archive._archive_batch([self.old_post.pk])
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertTrue(queries[0].startswith('SAVEPOINT'))
+        self.assertTrue(queries[-1].startswith('RELEASE SAVEPOINT'))
+        self.assertTrue(any('posts_comment' in sql for sql in queries))
+
+    def test_history_and_notifications_move_with_post(self):
+        revisions.record(
+            self.old_post.pk, self.author.pk, ('Пост 0', ''), ('Правка', '')
+        )
+        PostRank.objects.create(post=self.old_post, score=1)
+        archive.archive_old(days=730)
+        archived_post = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertEqual(archived_post.revisions.count(), 2)
+        self.assertEqual(
+            list(archived_post.notification_events.values_list(
+                'kind', flat=True
+            ).order_by('id')),
+            [NotificationEvent.POST, NotificationEvent.COMMENT]
+        )
+        self.assertFalse(PostRank.objects.exists())
+        notification = notifications.coalesce(self.author)[0]
+        self.assertEqual(notification.post, archived_post)
+
+    def test_hot_post_counts_archived_posts_of_author(self):
+        archive.archive_old(days=730)
+        response = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[-1].pk}
+        ))
+        self.assertEqual(response.context['post_number'], 12)
+
+    def test_archived_text_is_compressed(self):
+        Post.objects.filter(pk=self.old_post.pk).update(
+            text='Пост про котиков. ' * 30
+        )
+        archive.archive_old(days=730)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT text FROM posts_archivedpost WHERE id = %s',
+                [self.old_post.pk]
+            )
+            raw = bytes(cursor.fetchone()[0])
+        self.assertNotIn('Пост'.encode(), raw)
+
+    def test_archived_text_is_decoded_on_access(self):
+        long_text = 'Очень длинный старый пост. ' * 30
+        Post.objects.filter(pk=self.old_post.pk).update(text=long_text)
+        archive.archive_old(days=730)
+        archived_post = ArchivedPost.objects.get(pk=self.old_post.pk)
+        self.assertIsInstance(archived_post.__dict__['text'], bytes)
+        self.assertEqual(archived_post.excerpt, excerpts.excerpt(long_text))
+        self.assertEqual(archived_post.text, long_text)
+        self.assertEqual(archived_post.__dict__['text'], long_text)
+
+    def test_archived_post_detail_is_read_only(self):
+        archive.archive_old(days=730)
+        response = self.authorized_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.old_post.pk}
+        ))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['post'].is_archived)
+        self.assertEqual(response.context['post_number'], 12)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            ['Старый комментарий']
+        )
+        self.assertNotContains(response, 'id="comment-form"')
+
+    def test_missing_post_detail(self):
+        response = self.guest_client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': 0}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_profile_pages_continue_into_archive(self):
+        archive.archive_old(days=550)
+        self.assertEqual(ArchivedPost.objects.count(), 5)
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        first = self.guest_client.get(url)
+        second = self.guest_client.get(url, {'page': 2})
+        self.assertEqual(first.context['post_count'], 12)
+        posts = (
+            list(first.context['page_obj']) + list(second.context['page_obj'])
+        )
+        self.assertEqual(
+            [post.pk for post in posts],
+            [post.pk for post in reversed(self.posts)]
+        )
+        self.assertEqual(
+            [post.is_archived for post in posts], [False] * 7 + [True] * 5
+        )
+
+    def test_feeds_only_read_hot_posts(self):
+        archive.archive_old(days=730)
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(response.context['page_obj'].paginator.count, 9)
@@ -0,0 +1,131 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import duplicates
+from posts.models import Comment, ContentSignature, Post, User
+
+TEXT = (
+    'Продаю отличный велосипед почти новый в хорошем состоянии, '
+    'звоните по телефону в любое время, торг уместен'
+)
+SIMILAR = (
+    'Продаю отличный велосипед почти новый в хорошем состоянии, '
+    'пишите по телефону в любое время, торг уместен'
+)
+OTHER = (
+    'Сегодня ходили в поход на озеро, погода была прекрасная, '
+    'поймали три окуня и сварили уху на костре'
+)
+
+
+class DuplicateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bot = User.objects.create_user(username='bot')
+        cls.other_bot = User.objects.create_user(username='other_bot')
+        cls.post = Post.objects.create(author=cls.bot, text=OTHER)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.bot)
+        self.other_client = Client()
+        self.other_client.force_login(self.other_bot)
+
+    def create_post(self, client, text):
+        return client.post(reverse('posts:post_create'), {'text': text})
+
+    def test_signature_similarity(self):
+        signature = duplicates.signature(TEXT)
+        self.assertGreater(
+            duplicates.similarity(signature, duplicates.signature(SIMILAR)),
+            0.5
+        )
+        self.assertLess(
+            duplicates.similarity(signature, duplicates.signature(OTHER)),
+            0.2
+        )
+        self.assertIsNone(duplicates.signature('Спасибо за пост!'))
+
+    @override_settings(DUPLICATE_THRESHOLD=0.5)
+    def test_near_duplicate_post_is_rejected(self):
+        self.create_post(self.client, TEXT)
+        response = self.create_post(self.other_client, SIMILAR)
+        self.assertFormError(response, 'form', 'text', duplicates.REJECTED)
+        self.assertEqual(Post.objects.filter(author__in=[
+            self.bot, self.other_bot
+        ]).count(), 2)
+        self.assertEqual(ContentSignature.objects.count(), 1)
+
+    @override_settings(DUPLICATE_ACTION='flag', DUPLICATE_THRESHOLD=0.5)
+    def test_near_duplicate_post_is_flagged(self):
+        self.create_post(self.client, TEXT)
+        self.create_post(self.other_client, SIMILAR)
+        first, second = ContentSignature.objects.order_by('pk')
+        self.assertIsNone(first.duplicate_of)
+        self.assertEqual(second.duplicate_of, first)
+        self.assertEqual(second.author, self.other_bot)
+
+    def test_duplicate_comment_is_rejected(self):
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        self.client.post(url, {'text': TEXT})
+        response = self.other_client.post(
+            url, {'text': TEXT}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()['errors']['text'], [duplicates.REJECTED]
+        )
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_old_signatures_are_ignored_and_pruned(self):
+        self.create_post(self.client, TEXT)
+        ContentSignature.objects.update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        self.create_post(self.other_client, TEXT)
+        self.assertEqual(Post.objects.filter(text=TEXT).count(), 2)
+        out = StringIO()
+        call_command('prune_signatures', stdout=out)
+        self.assertIn('Удалено подписей: 1', out.getvalue())
+        self.assertEqual(ContentSignature.objects.count(), 1)
+
+    @override_settings(DUPLICATE_THRESHOLD=0.5)
+    def test_edit_is_checked_and_refreshes_signature(self):
+        self.create_post(self.client, TEXT)
+        post = Post.objects.create(author=self.other_bot, text='Пост')
+        url = reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        response = self.other_client.post(url, {'text': SIMILAR})
+        self.assertFormError(response, 'form', 'text', duplicates.REJECTED)
+        self.other_client.post(url, {'text': OTHER + ' и ещё раз'})
+        signature = ContentSignature.objects.get(object_id=post.pk)
+        self.other_client.post(url, {'text': OTHER + ' и снова'})
+        self.assertFalse(
+            ContentSignature.objects.filter(pk=signature.pk).exists()
+        )
+        self.assertEqual(
+            ContentSignature.objects.filter(object_id=post.pk).count(), 1
+        )
+
+    def test_signature_is_removed_with_post(self):
+        self.create_post(self.client, TEXT)
+        Post.objects.get(text=TEXT).delete()
+        self.assertFalse(ContentSignature.objects.exists())
+        self.create_post(self.other_client, TEXT)
+        self.assertTrue(
+            Post.objects.filter(author=self.other_bot, text=TEXT).exists()
+        )
+
+    def test_clusters_of_existing_posts(self):
+        first = Post.objects.create(author=self.bot, text=TEXT)
+        second = Post.objects.create(author=self.other_bot, text=TEXT)
+        third = Post.objects.create(author=self.bot, text=TEXT + '!')
+        Post.objects.create(author=self.bot, text='Короткий пост')
+        self.assertEqual(
+            duplicates.clusters(Post.objects.all(), batch_size=2),
+            [[first.pk, second.pk, third.pk]]
+        )
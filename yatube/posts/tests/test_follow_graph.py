@@ -0,0 +1,82 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from posts import follow_graph
+from posts.models import Follow, User
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.authors = [
+            User.objects.create_user(username='author' + str(i))
+            for i in range(3)
+        ]
+        Follow.objects.create(user=cls.reader, author=cls.authors[0])
+        Follow.objects.create(user=cls.reader, author=cls.authors[2])
+
+    def setUp(self):
+        cache.clear()
+        follow_graph.clear()
+
+    def test_lookups_are_served_from_memory(self):
+        follow_graph.authors(self.reader.pk)
+        with self.assertNumQueries(0):
+            self.assertTrue(
+                follow_graph.is_following(self.reader.pk, self.authors[0].pk)
+            )
+            self.assertFalse(
+                follow_graph.is_following(self.reader.pk, self.authors[1].pk)
+            )
+            self.assertEqual(
+                follow_graph.following_among(
+                    self.reader.pk, [author.pk for author in self.authors]
+                ),
+                {self.authors[0].pk, self.authors[2].pk}
+            )
+
+    def test_follow_signals_invalidate_graph(self):
+        self.assertFalse(
+            follow_graph.is_following(self.reader.pk, self.authors[1].pk)
+        )
+        Follow.objects.create(user=self.reader, author=self.authors[1])
+        self.assertTrue(
+            follow_graph.is_following(self.reader.pk, self.authors[1].pk)
+        )
+        Follow.objects.filter(user=self.reader).delete()
+        self.assertFalse(
+            follow_graph.is_following(self.reader.pk, self.authors[0].pk)
+        )
+
+    def test_versions_are_checked_once_per_ttl(self):
+        follow_graph.authors(self.reader.pk)
+        with mock.patch('posts.follow_graph._version') as version:
+            follow_graph.is_following(self.reader.pk, self.authors[0].pk)
+        version.assert_not_called()
+
+    @override_settings(FOLLOW_GRAPH_VERSION_TTL=0)
+    def test_other_processes_changes_are_seen_after_ttl(self):
+        self.assertFalse(
+            follow_graph.is_following(self.reader.pk, self.authors[1].pk)
+        )
+        Follow.objects.bulk_create(
+            [Follow(user=self.reader, author=self.authors[1])]
+        )
+        cache.set(follow_graph.VERSION_KEY.format(self.reader.pk), 'other')
+        self.assertTrue(
+            follow_graph.is_following(self.reader.pk, self.authors[1].pk)
+        )
+
+    @override_settings(FOLLOW_GRAPH_SIZE=2)
+    def test_graph_keeps_recently_used_users(self):
+        for user in [self.reader] + self.authors[:2]:
+            follow_graph.authors(user.pk)
+        follow_graph.authors(self.authors[0].pk)
+        follow_graph.authors(self.authors[2].pk)
+        self.assertEqual(
+            list(follow_graph._graph),
+            [self.authors[0].pk, self.authors[2].pk]
+        )
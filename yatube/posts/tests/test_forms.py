@@ -6,8 +6,7 @@ from posts.models import Comment, Post, User
 
 class PostCreateFormTests(TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='lev')
         cls.post = Post.objects.create(
             author=cls.user,
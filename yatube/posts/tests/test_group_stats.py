@@ -0,0 +1,99 @@
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import group_stats
+from posts.models import Group, GroupAuthorStats, GroupStats, Post, User
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.other = User.objects.create_user(username='other')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.group_second = Group.objects.create(
+            title='Вторая группа',
+            slug='test-slug-2',
+            description='Тестовое описание 2',
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_stats_created_with_group(self):
+        self.assertEqual(self.stats(self.group).post_count, 0)
+
+    def test_post_create_and_delete_update_stats(self):
+        post = Post.objects.create(
+            author=self.user, text='Текст', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Текст', group=self.group)
+        Post.objects.create(author=self.other, text='Текст', group=self.group)
+        stats = self.stats(self.group)
+        self.assertEqual(stats.post_count, 3)
+        self.assertEqual(stats.top_authors, 'auth, other')
+        self.assertIsNotNone(stats.last_activity)
+        post.delete()
+        stats = self.stats(self.group)
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(stats.top_authors, 'auth, other')
+        self.assertEqual(
+            GroupAuthorStats.objects.get(
+                group=self.group, author=self.user
+            ).post_count,
+            1
+        )
+
+    def test_group_change_moves_post_between_stats(self):
+        post = Post.objects.create(
+            author=self.user, text='Текст', group=self.group
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.group_second
+        post.save()
+        self.assertEqual(self.stats(self.group).post_count, 0)
+        self.assertEqual(self.stats(self.group).top_authors, '')
+        self.assertEqual(self.stats(self.group_second).post_count, 1)
+        self.assertFalse(
+            GroupAuthorStats.objects.filter(group=self.group).exists()
+        )
+
+    def test_removal_recomputes_last_activity(self):
+        first = Post.objects.create(
+            author=self.user, text='Текст', group=self.group
+        )
+        newest = Post.objects.create(
+            author=self.user, text='Текст', group=self.group
+        )
+        self.assertEqual(self.stats(self.group).last_activity, newest.pub_date)
+        newest.group = self.group_second
+        newest.save()
+        self.assertEqual(self.stats(self.group).last_activity, first.pub_date)
+        first.delete()
+        self.assertIsNone(self.stats(self.group).last_activity)
+
+    def test_rebuild_matches_incremental_stats(self):
+        Post.objects.create(author=self.user, text='Текст', group=self.group)
+        Post.objects.create(author=self.other, text='Текст', group=self.group)
+        GroupStats.objects.all().update(post_count=0, top_authors='')
+        group_stats.rebuild()
+        self.assertEqual(self.stats(self.group).post_count, 2)
+        self.assertEqual(self.stats(self.group_second).post_count, 0)
+
+    def test_group_index_page(self):
+        Post.objects.create(author=self.user, text='Текст', group=self.group)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(reverse('posts:group_index'))
+        self.assertTemplateUsed(response, 'posts/group_index.html')
+        self.assertEqual(
+            list(response.context['groups']),
+            [self.group, self.group_second]
+        )
+        self.assertIn('max-age=', response['Cache-Control'])
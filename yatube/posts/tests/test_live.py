@@ -0,0 +1,210 @@
+import json
+import threading
+
+from django.core.cache import cache
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts import live
+from posts.models import Comment, Follow, Group, Post, User
+
+
+def read_event(response):
+    for chunk in response.streaming_content:
+        chunk = chunk.decode()
+        if chunk.startswith('id:'):
+            lines = dict(
+                line.split(': ', 1) for line in chunk.strip().split('\n')
+            )
+            return lines['event'], json.loads(lines['data'])
+
+
+@override_settings(LIVE_HEARTBEAT=0.01, LIVE_MAX_DURATION=0.5)
+class LiveFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        live.reset()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def publish_after_subscribe(self, response, **fields):
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertTrue(next(response.streaming_content).startswith(
+            b'retry:'
+        ))
+        post = Post.objects.create(
+            author=self.author, text='Новый пост', **fields
+        )
+        live.post_created(post)
+        return post
+
+    def test_index_stream_pushes_rendered_card(self):
+        response = self.guest_client.get(reverse('posts:index_stream'))
+        post = self.publish_after_subscribe(response)
+        event, data = read_event(response)
+        self.assertEqual(event, 'post')
+        self.assertEqual(data['id'], post.pk)
+        self.assertIn('Новый пост', data['html'])
+
+    def test_group_stream_ignores_other_groups(self):
+        response = self.guest_client.get(reverse(
+            'posts:group_stream', kwargs={'slug': self.group.slug}
+        ))
+        self.publish_after_subscribe(response, group=self.other_group)
+        self.assertIsNone(read_event(response))
+
+    def test_follow_stream_receives_followed_authors(self):
+        response = self.authorized_client.get(reverse('posts:follow_stream'))
+        post = self.publish_after_subscribe(response)
+        self.assertEqual(read_event(response)[1]['id'], post.pk)
+
+    def test_follow_stream_requires_login(self):
+        response = self.guest_client.get(reverse('posts:follow_stream'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_post_stream_pushes_comment_fragment(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        response = self.guest_client.get(reverse(
+            'posts:post_stream', kwargs={'post_id': post.pk}
+        ))
+        next(response.streaming_content)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Новый комментарий'
+        )
+        live.comment_created(comment)
+        event, data = read_event(response)
+        self.assertEqual(event, 'comment')
+        self.assertIn('id="comment-{}"'.format(comment.pk), data['html'])
+
+    def test_post_stream_of_missing_post(self):
+        response = self.guest_client.get(reverse(
+            'posts:post_stream', kwargs={'post_id': 0}
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_fetch_comment_returns_fragment(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        url = reverse('posts:add_comment', kwargs={'post_id': post.pk})
+        # Пользователь, проверка поста, вставка комментария, автор поста
+        # и запись события уведомлений.
+        with self.assertNumQueries(5):
+            response = self.authorized_client.post(
+                url, {'text': 'Коммент'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+            )
+        self.assertEqual(response.status_code, 201)
+        self.assertTemplateUsed(response, 'includes/comment.html')
+        self.assertEqual(
+            int(response['X-Comment-Id']), post.comments.get().pk
+        )
+        self.assertIn('Коммент', response.content.decode())
+        self.assertNotIn('<html', response.content.decode())
+
+    def test_fetch_comment_with_errors(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        response = self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': ''}, HTTP_X_REQUESTED_WITH='XMLHttpRequest'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('text', response.json()['errors'])
+        self.assertFalse(post.comments.exists())
+
+    def test_post_page_opens_stream_on_demand(self):
+        post = Post.objects.create(author=self.author, text='Пост')
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        content = response.content.decode()
+        self.assertIn('id="comments-live"', content)
+        self.assertIn('id="comment-errors"', content)
+        self.assertLess(
+            content.index("live.addEventListener('click'"),
+            content.index('new EventSource(')
+        )
+
+    def test_feed_opens_stream_on_demand(self):
+        response = self.guest_client.get(reverse('posts:index'))
+        content = response.content.decode()
+        self.assertIn('id="live-start"', content)
+        self.assertLess(
+            content.index("start.addEventListener('click'"),
+            content.index('new EventSource(')
+        )
+
+    def test_feed_pages_cache_their_own_stream_url(self):
+        self.authorized_client.get(reverse('posts:index'))
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        content = response.content.decode()
+        self.assertIn(reverse('posts:follow_stream'), content)
+        self.assertNotIn(
+            "'{}'".format(reverse('posts:index_stream')), content
+        )
+
+    @override_settings(LIVE_POLL_INTERVAL=0.01)
+    def test_cache_broker_delivers_across_instances(self):
+        subscription = live.CacheBroker().subscribe({live.index_channel()})
+        live.CacheBroker().publish(
+            {live.index_channel()}, {'type': 'post', 'data': {'id': 1}}
+        )
+        live.CacheBroker().publish(
+            {live.group_channel(1)}, {'type': 'post', 'data': {'id': 2}}
+        )
+        self.assertEqual(subscription.get(1)['data'], {'id': 1})
+        self.assertIsNone(subscription.get(0.05))
+        subscription.close()
+
+    @override_settings(LIVE_POLL_INTERVAL=60)
+    def test_cache_broker_polls_once_per_process(self):
+        broker = live.CacheBroker()
+        subscriptions = [
+            broker.subscribe({live.index_channel()}) for _ in range(3)
+        ]
+        threads = [
+            threading.Thread(target=live.CacheBroker().publish, args=(
+                {live.index_channel()}, {'type': 'post', 'data': {}}
+            ))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        broker.poll()
+        for subscription in subscriptions:
+            ids = [subscription.get(0)['id'] for _ in range(8)]
+            self.assertEqual(sorted(ids), list(range(1, 9)))
+            subscription.close()
+
+
+class LiveSignalTests(TransactionTestCase):
+    def setUp(self):
+        live.reset()
+        self.author = User.objects.create_user(username='author')
+
+    def test_new_post_is_published_after_commit(self):
+        subscription = live.broker().subscribe({
+            live.author_channel(self.author.pk)
+        })
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(subscription.get(0.1)['data']['id'], post.pk)
+        post.save()
+        self.assertIsNone(subscription.get(0.01))
@@ -1,3 +1,6 @@
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Concat
 from django.test import TestCase
 
 from posts.models import Group, Post, User
@@ -5,8 +8,7 @@ from posts.models import Group, Post, User
 
 class PostModelTest(TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='auth')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -82,3 +84,35 @@ class PostModelTest(TestCase):
             with self.subTest(field_key=field_key):
                 self.assertEqual(
                     post._meta.get_field(field_key).help_text, expected_value)
+
+    def test_post_excerpt_is_stored_on_save(self):
+        post = Post.objects.create(
+            author=self.user, text=' '.join(['слово'] * 40)
+        )
+        self.assertEqual(post.excerpt, ' '.join(['слово'] * 30) + '…')
+        post.text = 'Короткий текст'
+        post.save(update_fields=['text'])
+        post.refresh_from_db()
+        self.assertEqual(post.excerpt, 'Короткий текст')
+
+    def test_queryset_update_refreshes_excerpt(self):
+        posts = Post.objects.filter(pk=self.post.pk)
+        posts.update(text='Новый текст')
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.excerpt, 'Новый текст')
+        self.assertEqual(post.text_html, 'Новый текст')
+        posts.update(text=Concat('text', Value(' и ещё')))
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.excerpt, 'Новый текст и ещё')
+        self.assertEqual(post.text_html, 'Новый текст и ещё')
+
+    def test_post_html_is_stored_compressed(self):
+        text = 'Длинный пост про котиков и собак. ' * 20
+        post = Post.objects.create(author=self.user, text=text)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT text_html FROM posts_post WHERE id = %s', [post.pk]
+            )
+            raw = bytes(cursor.fetchone()[0])
+        self.assertLess(len(raw), len(text.encode()) // 4)
+        self.assertEqual(Post.objects.get(pk=post.pk).text_html, text)
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import follow_graph, notifications
+from posts.models import Comment, Follow, NotificationEvent, Post, User
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com'
+        )
+        cls.readers = [
+            User.objects.create_user(
+                username='reader' + str(i),
+                email='reader{}@example.com'.format(i)
+            )
+            for i in range(3)
+        ]
+        for reader in cls.readers:
+            Follow.objects.create(user=reader, author=cls.author)
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        follow_graph.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def comment(self, author, text='Комментарий'):
+        return Comment.objects.create(post=self.post, author=author, text=text)
+
+    def test_new_post_is_logged_once(self):
+        self.assertEqual(NotificationEvent.objects.filter(
+            kind=NotificationEvent.POST, post=self.post
+        ).count(), 1)
+        for reader in self.readers:
+            self.assertEqual(notifications.unread_count(reader), 1)
+
+    def test_comments_are_coalesced_per_post(self):
+        for reader in self.readers:
+            self.comment(reader)
+        self.comment(self.author)
+        items = notifications.coalesce(self.author)
+        self.assertEqual(len(items), 1)
+        self.assertEqual(items[0].kind, NotificationEvent.COMMENT)
+        self.assertEqual(items[0].count, 3)
+        self.assertEqual(items[0].actor, self.readers[-1])
+
+    def test_unread_count_is_cached_and_incremental(self):
+        self.comment(self.readers[0])
+        self.assertEqual(notifications.unread_count(self.author), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.author), 1)
+        self.comment(self.readers[1])
+        self.assertEqual(notifications.unread_count(self.author), 2)
+
+    def test_other_users_events_keep_count_cached(self):
+        self.comment(self.readers[0])
+        self.assertEqual(notifications.unread_count(self.author), 1)
+        other_post = Post.objects.create(author=self.readers[1], text='Пост')
+        Comment.objects.create(
+            post=other_post, author=self.readers[2], text='Комментарий'
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.author), 1)
+        self.assertEqual(notifications.unread_count(self.readers[1]), 2)
+
+    def test_header_counts_once_per_request(self):
+        with mock.patch(
+            'posts.notifications.unread_count',
+            wraps=notifications.unread_count
+        ) as unread_count:
+            self.author_client.get(reverse('posts:index'))
+        self.assertEqual(unread_count.call_count, 1)
+
+    def test_opening_inbox_marks_read(self):
+        self.comment(self.readers[0])
+        response = self.author_client.get(reverse('posts:notifications'))
+        self.assertTemplateUsed(response, 'posts/notifications.html')
+        self.assertTrue(response.context['notifications'][0].unread)
+        self.assertEqual(notifications.unread_count(self.author), 0)
+        response = self.author_client.get(reverse('posts:notifications'))
+        self.assertFalse(response.context['notifications'][0].unread)
+
+    def test_digests_are_sent_once_in_batches(self):
+        self.comment(self.readers[0])
+        since = timezone.now() - timedelta(hours=1)
+        self.assertEqual(notifications.send_digests(since, batch_size=2), 4)
+        self.assertEqual(
+            sorted(message.to[0] for message in mail.outbox),
+            sorted(user.email for user in [self.author] + self.readers)
+        )
+        self.assertEqual(notifications.send_digests(since), 0)
@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from core import perf
+from posts import trending
+from posts.models import Comment, Follow, Group, Post, User
+
+# Бюджеты считаются на наборе данных из setUpTestData: при его изменении
+# бюджеты нужно пересмотреть. Допуск задаётся PERF_BUDGET_TOLERANCE.
+# Время — медиана REPEAT запросов.
+REPEAT = 5
+BUDGETS = {
+    'index': {'queries': 2, 'rows': 11, 'time_ms': 300},
+    'group_list': {'queries': 3, 'rows': 12, 'time_ms': 300},
+    'group_index': {'queries': 1, 'rows': 3, 'time_ms': 300},
+    'trending': {'queries': 1, 'rows': 10, 'time_ms': 300},
+    'profile': {'queries': 6, 'rows': 12, 'time_ms': 300},
+    'post_detail': {'queries': 2, 'rows': 4, 'time_ms': 300},
+    'follow_index': {'queries': 3, 'rows': 11, 'time_ms': 300},
+}
+
+
+class ViewPerformanceTests(TestCase):
+    results = {}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.authors = [
+            User.objects.create_user(username='author' + str(i))
+            for i in range(5)
+        ]
+        cls.reader = User.objects.create_user(username='reader')
+        cls.groups = [
+            Group.objects.create(
+                title='Группа ' + str(i),
+                slug='group-' + str(i),
+                description='Описание',
+            )
+            for i in range(3)
+        ]
+        cls.posts = [
+            Post.objects.create(
+                author=cls.authors[i % 5],
+                group=cls.groups[i % 3],
+                text='Пост ' + str(i),
+            )
+            for i in range(40)
+        ]
+        for post in cls.posts[:10]:
+            for author in cls.authors[:3]:
+                Comment.objects.create(
+                    post=post, author=author, text='Комментарий'
+                )
+        for author in cls.authors[:2]:
+            Follow.objects.create(user=cls.reader, author=author)
+        trending.update_ranks()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        if settings.PERF_REPORT_PATH:
+            perf.write_report(settings.PERF_REPORT_PATH, cls.results)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        # Первый запрос прогревает сессию и кэш пользователя.
+        self.client.get(reverse('posts:group_index'))
+
+    def assertWithinBudget(self, name, path):
+        response, result = perf.measure(self.client, path, repeat=REPEAT)
+        self.assertEqual(response.status_code, 200)
+        self.results[name] = dict(result, budget=BUDGETS[name])
+        problems = perf.violations(result, BUDGETS[name])
+        self.assertFalse(problems, '{}: {}'.format(name, problems))
+
+    def test_index(self):
+        self.assertWithinBudget('index', reverse('posts:index'))
+
+    def test_group_list(self):
+        self.assertWithinBudget('group_list', reverse(
+            'posts:group_list', kwargs={'slug': self.groups[0].slug}
+        ))
+
+    def test_group_index(self):
+        self.assertWithinBudget('group_index', reverse('posts:group_index'))
+
+    def test_trending(self):
+        self.assertWithinBudget('trending', reverse('posts:trending'))
+
+    def test_profile(self):
+        self.assertWithinBudget('profile', reverse(
+            'posts:profile', kwargs={'username': self.authors[0].username}
+        ))
+
+    def test_post_detail(self):
+        self.assertWithinBudget('post_detail', reverse(
+            'posts:post_detail', kwargs={'post_id': self.posts[0].pk}
+        ))
+
+    def test_follow_index(self):
+        self.assertWithinBudget('follow_index', reverse('posts:follow_index'))
+
+
+class BudgetTests(TestCase):
+    def test_repeat_reports_median_time(self):
+        client = Client()
+        response, result = perf.measure(
+            client, reverse('about:author'), repeat=3
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(result['queries'], 0)
+        self.assertGreater(result['time_ms'], 0)
+
+    def test_tolerance_widens_limits(self):
+        budget = {'queries': 10, 'rows': 10, 'time_ms': 100}
+        result = {'queries': 11, 'rows': 10, 'time_ms': 110}
+        self.assertEqual(len(perf.violations(result, budget, 0)), 2)
+        self.assertEqual(perf.violations(result, budget, 0.2), [])
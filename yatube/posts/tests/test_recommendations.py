@@ -0,0 +1,75 @@
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import recommendations
+from posts.models import AuthorRecommendation, Follow, User
+
+
+class RecommendationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.neighbour = User.objects.create_user(username='neighbour')
+        cls.popular = User.objects.create_user(username='popular')
+        cls.niche = User.objects.create_user(username='niche')
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.popular)
+        Follow.objects.create(user=cls.neighbour, author=cls.friend)
+        Follow.objects.create(user=cls.neighbour, author=cls.niche)
+        Follow.objects.create(user=cls.neighbour, author=cls.popular)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def recommended(self, user):
+        return list(
+            AuthorRecommendation.objects.filter(user=user).values_list(
+                'author__username', flat=True
+            )
+        )
+
+    def test_friend_of_friend_ranked_above_co_follow(self):
+        recommendations.build()
+        self.assertEqual(self.recommended(self.reader), ['popular', 'niche'])
+
+    @override_settings(RECOMMENDATIONS_BATCH=1)
+    def test_partitions_give_same_results(self):
+        recommendations.build()
+        self.assertEqual(self.recommended(self.reader), ['popular', 'niche'])
+        self.assertEqual(self.recommended(self.friend), ['niche'])
+
+    @override_settings(RECOMMENDATIONS_MAX_FOLLOWING=1)
+    def test_fan_out_is_capped(self):
+        following = recommendations.load_partition([self.neighbour.pk])[0]
+        self.assertEqual(list(following[self.neighbour.pk]), [self.popular.pk])
+        recommendations.build()
+        self.assertEqual(self.recommended(self.reader), ['popular'])
+
+    def test_followed_authors_and_self_are_not_recommended(self):
+        recommendations.build()
+        recommended = self.recommended(self.neighbour)
+        self.assertNotIn('neighbour', recommended)
+        self.assertNotIn('friend', recommended)
+
+    def test_rebuild_replaces_stale_rows(self):
+        recommendations.build()
+        Follow.objects.filter(user=self.reader).delete()
+        recommendations.build()
+        self.assertEqual(self.recommended(self.reader), [])
+
+    def test_pages_show_recommendations(self):
+        recommendations.build()
+        Follow.objects.create(user=self.reader, author=self.niche)
+        for url in (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', kwargs={'username': 'friend'}),
+        ):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(
+                    [item.author for item in
+                     response.context['recommendations']],
+                    [self.popular]
+                )
@@ -0,0 +1,104 @@
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.urls import reverse
+
+from posts import revisions
+from posts.models import Post, PostRevision, User
+
+
+@override_settings(REVISIONS_SNAPSHOT_EVERY=3)
+class RevisionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Первая версия длинного поста\nВторая строка'
+        )
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def edit_many(self, count):
+        texts = [self.post.text]
+        for i in range(count):
+            text = texts[-1] + ' правка ' + str(i)
+            revisions.record(
+                self.post.pk, self.author.pk, (texts[-1], ''), (text, '')
+            )
+            texts.append(text)
+        return texts
+
+    def test_diff_round_trip(self):
+        old = 'Раз два  три\nчетыре пять'
+        new = 'Раз три\nчетыре шесть пять\n'
+        self.assertEqual(
+            revisions.apply_diff(old, revisions.make_diff(old, new)), new
+        )
+
+    def test_every_revision_is_reconstructed(self):
+        texts = self.edit_many(7)
+        self.assertEqual(
+            list(PostRevision.objects.filter(
+                post=self.post, is_snapshot=True
+            ).order_by('number').values_list('number', flat=True)),
+            [1, 4, 7]
+        )
+        for number, text in enumerate(texts, 1):
+            self.assertEqual(revisions.text_at(self.post.pk, number), text)
+
+    def test_diff_is_based_on_last_revision(self):
+        texts = self.edit_many(1)
+        changed = texts[-1] + ' без истории'
+        revisions.record(
+            self.post.pk, self.author.pk, (changed, ''), (changed + '!', '')
+        )
+        self.assertEqual(
+            [revisions.text_at(self.post.pk, number) for number in (3, 4)],
+            [changed, changed + '!']
+        )
+        self.assertIsNone(
+            PostRevision.objects.get(post=self.post, number=3).editor
+        )
+
+    def test_reconstruction_is_bounded(self):
+        self.edit_many(7)
+        with self.assertNumQueries(2):
+            revisions.text_at(self.post.pk, 6)
+
+    def test_history_is_paginated_by_revision(self):
+        texts = self.edit_many(2)
+        response = self.author_client.get(
+            reverse('posts:post_history', kwargs={'post_id': self.post.pk}),
+            {'page': 2}
+        )
+        self.assertEqual(response.context['page_obj'].paginator.count, 3)
+        self.assertEqual(response.context['revision'].number, 2)
+        self.assertEqual(response.context['text'], texts[1])
+        self.assertIn('+', response.context['diff'])
+
+    def test_history_is_hidden_from_readers(self):
+        response = self.reader_client.get(
+            reverse('posts:post_history', kwargs={'post_id': self.post.pk})
+        )
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        ))
+
+
+class PostEditRevisionTests(TransactionTestCase):
+    def test_edit_records_revisions_after_commit(self):
+        author = User.objects.create_user(username='author')
+        post = Post.objects.create(author=author, text='Старый текст')
+        client = Client()
+        client.force_login(author)
+        url = reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        client.post(url, {'text': 'Новый текст'})
+        client.post(url, {'text': 'Новый текст'})
+        self.assertEqual(post.revisions.count(), 2)
+        self.assertEqual(revisions.text_at(post.pk, 1), 'Старый текст')
+        self.assertEqual(revisions.text_at(post.pk, 2), 'Новый текст')
@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Follow, Group, Post, PostRank, User
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.quiet_post = Post.objects.create(
+            author=cls.author,
+            text='Тихий пост',
+        )
+        cls.hot_post = Post.objects.create(
+            author=cls.author,
+            text='Обсуждаемый пост',
+            group=cls.group,
+        )
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.hot_post,
+                author=cls.reader,
+                text='Комментарий' + str(i),
+            )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_score_decays_with_age(self):
+        self.assertGreater(trending.score(1, 1, 0), trending.score(1, 1, 24))
+
+    def test_comments_raise_rank(self):
+        trending.update_ranks()
+        self.assertEqual(
+            list(PostRank.objects.values_list('post', flat=True)),
+            [self.hot_post.pk, self.quiet_post.pk]
+        )
+
+    def test_posts_outside_window_are_dropped(self):
+        trending.update_ranks(now=timezone.now() + timedelta(days=30))
+        self.assertFalse(PostRank.objects.exists())
+
+    def test_trending_page(self):
+        trending.update_ranks()
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(reverse('posts:trending'))
+        self.assertTemplateUsed(response, 'posts/trending.html')
+        self.assertEqual(response.context['ranks'][0].post, self.hot_post)
+        self.assertEqual(response.context['groups'], [self.group])
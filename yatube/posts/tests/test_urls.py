@@ -8,8 +8,7 @@ from posts.models import Group, Post, User
 
 class PostURLTests(TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='not_author')
         cls.author = User.objects.create_user(username='test_name1')
         cls.no_author = User.objects.create_user(username='no_author')
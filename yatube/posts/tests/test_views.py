@@ -1,25 +1,20 @@
-import shutil
-import tempfile
+from io import StringIO
 
 from django import forms
-from django.conf import settings
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
 from posts.forms import PostForm
-from posts.models import Follow, Group, Post, User
+from posts.models import Comment, Follow, Group, Post, User
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
-
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostPagesTests(TestCase):
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='auth')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -51,11 +46,6 @@ class PostPagesTests(TestCase):
             'group': forms.fields.ChoiceField,
         }
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def setUp(self):
         self.guest_client = Client()
         self.authorized_client = Client()
@@ -139,8 +129,7 @@ class PaginatorViewsTest(TestCase):
     THREE_POSTS = 3
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='auth')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -188,12 +177,32 @@ class PaginatorViewsTest(TestCase):
             reverse('posts:profile', kwargs={'username': 'auth'}) + '?page=2')
         self.assertEqual(len(response.context['page_obj']), 3)
 
+    def test_paginator_is_rendered_once(self):
+        Follow.objects.create(
+            user=User.objects.create_user(username='reader'),
+            author=self.user
+        )
+        self.authorized_client.force_login(
+            User.objects.get(username='reader')
+        )
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.authorized_client.get(url),
+                    'class="pagination"',
+                    count=1
+                )
+
 
 class PostIntegrationViewsTests(TestCase):
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='auth')
         cls.group = Group.objects.create(
             title='Тестовая группа 1',
@@ -236,8 +245,7 @@ class PostIntegrationViewsTests(TestCase):
 class CacheTests(TestCase):
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username="auth")
 
         cls.post_user = Post.objects.create(
@@ -263,8 +271,7 @@ class CacheTests(TestCase):
 class FollowTests(TestCase):
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user_follower = User.objects.create_user(username='follower')
         cls.user_following = User.objects.create_user(username='following')
         cls.post = Post.objects.create(
@@ -279,19 +286,221 @@ class FollowTests(TestCase):
         self.client_auth_following.force_login(self.user_following)
 
     def test_follow(self):
-        self.client_auth_follower.get(
-            reverse('posts:profile_follow',
-                    kwargs={'username': self.user_following.username})
-        )
+        for _ in range(2):
+            self.client_auth_follower.post(
+                reverse('posts:profile_follow',
+                        kwargs={'username': self.user_following.username})
+            )
         self.assertEqual(Follow.objects.all().count(), 1)
 
     def test_unfollow(self):
-        self.client_auth_follower.get(
+        self.client_auth_follower.post(
             reverse('posts:profile_follow',
                     kwargs={'username': self.user_following.username})
         )
-        self.client_auth_follower.get(
+        self.client_auth_follower.post(
             reverse('posts:profile_unfollow',
                     kwargs={'username': self.user_following.username})
         )
         self.assertEqual(Follow.objects.all().count(), 0)
+
+    def test_delete_unfollows(self):
+        url = reverse('posts:profile_follow',
+                      kwargs={'username': self.user_following.username})
+        self.client_auth_follower.post(url)
+        for _ in range(2):
+            response = self.client_auth_follower.delete(url)
+            self.assertEqual(response.status_code, 204)
+        self.assertEqual(Follow.objects.all().count(), 0)
+
+    def test_get_only_asks_for_confirmation(self):
+        kwargs = {'username': self.user_following.username}
+        response = self.client_auth_follower.get(
+            reverse('posts:profile_follow', kwargs=kwargs)
+        )
+        self.assertTemplateUsed(response, 'posts/follow_confirm.html')
+        self.assertContains(response, 'method="post"')
+        self.assertEqual(Follow.objects.all().count(), 0)
+        Follow.objects.create(
+            user=self.user_follower, author=self.user_following
+        )
+        response = self.client_auth_follower.get(
+            reverse('posts:profile_unfollow', kwargs=kwargs)
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Follow.objects.all().count(), 1)
+
+
+class QueryCountTests(TestCase):
+    COMMENTS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Тестовый текст',
+            group=cls.group,
+        )
+        for i in range(cls.COMMENTS):
+            Comment.objects.create(
+                post=cls.post,
+                author=cls.reader,
+                text='Комментарий' + str(i),
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_profile_queries(self):
+        # Автор, счётчики рабочей и архивной таблиц, страница постов.
+        with self.assertNumQueries(4):
+            self.guest_client.get(
+                reverse('posts:profile',
+                        kwargs={'username': self.author.username}))
+
+    def test_profile_following_in_author_query(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.authorized_client.get(
+            reverse('posts:profile',
+                    kwargs={'username': self.author.username}))
+        self.assertTrue(response.context['following'])
+        self.assertEqual(response.context['post_count'], 1)
+
+    def test_post_detail_queries(self):
+        with self.assertNumQueries(2):
+            response = self.guest_client.get(
+                reverse('posts:post_detail',
+                        kwargs={'post_id': self.post.pk}))
+        self.assertEqual(response.context['post_number'], 1)
+        self.assertEqual(len(response.context['comments']), self.COMMENTS)
+
+
+class ExcerptViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.text = '<b>Начало</b>\n' + ' '.join(['слово'] * 40) + ' конец'
+        cls.post = Post.objects.create(
+            author=cls.user, group=cls.group, text=cls.text
+        )
+        Follow.objects.create(
+            user=User.objects.create_user(username='reader'),
+            author=cls.user
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.get(username='reader'))
+
+    def test_post_stores_rendered_text(self):
+        self.assertTrue(self.post.has_more)
+        self.assertTrue(
+            self.post.text_html.startswith('&lt;b&gt;Начало&lt;/b&gt;<br>')
+        )
+        self.assertNotIn('конец', self.post.excerpt_html)
+
+    def test_feeds_show_excerpt_with_read_more_link(self):
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'auth'}),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'читать дальше')
+                self.assertContains(response, '&lt;b&gt;Начало')
+                self.assertNotContains(response, 'конец')
+
+    def test_post_detail_shows_full_text(self):
+        response = self.client.get(reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        ))
+        self.assertContains(response, 'конец')
+        self.assertNotContains(response, '<b>Начало')
+
+    def test_render_posts_command(self):
+        Post.objects.filter(pk=self.post.pk).update(
+            excerpt='', excerpt_html='', text_html=''
+        )
+        call_command('render_posts', stdout=StringIO())
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.text_html, self.post.text_html)
+        self.assertEqual(post.excerpt_html, self.post.excerpt_html)
+
+
+class IdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_double_submitted_post_is_created_once(self):
+        url = reverse('posts:post_create')
+        data = {'text': 'Новый пост', 'idempotency_key': 'key-1'}
+        first = self.client.post(url, data)
+        with self.assertNumQueries(0):
+            second = self.client.post(url, data)
+        self.assertEqual(second.status_code, first.status_code)
+        self.assertEqual(second['Location'], first['Location'])
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(Post.objects.filter(text='Новый пост').count(), 1)
+        self.client.post(url, {**data, 'idempotency_key': 'key-2'})
+        self.assertEqual(Post.objects.filter(text='Новый пост').count(), 2)
+
+    def test_retried_comment_returns_same_comment(self):
+        url = reverse('posts:add_comment', kwargs={'post_id': self.post.pk})
+        responses = [
+            self.client.post(
+                url, {'text': 'Комментарий'},
+                HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+                HTTP_IDEMPOTENCY_KEY='key-1'
+            )
+            for _ in range(2)
+        ]
+        self.assertEqual(
+            responses[0]['X-Comment-Id'], responses[1]['X-Comment-Id']
+        )
+        self.assertEqual(responses[1].status_code, 201)
+        self.assertEqual(Comment.objects.count(), 1)
+
+    def test_failed_request_can_be_resubmitted(self):
+        url = reverse('posts:post_create')
+        self.client.post(url, {'text': '', 'idempotency_key': 'key-1'})
+        self.client.post(url, {'text': 'Текст', 'idempotency_key': 'key-1'})
+        self.assertTrue(Post.objects.filter(text='Текст').exists())
+
+    @override_settings(THROTTLE_RATES={'post': (1, 60)})
+    def test_retries_do_not_spend_rate_limit(self):
+        url = reverse('posts:post_create')
+        data = {'text': 'Новый пост', 'idempotency_key': 'key-1'}
+        for _ in range(3):
+            self.assertEqual(self.client.post(url, data).status_code, 302)
+
+    def test_forms_carry_idempotency_key(self):
+        for url in (
+            reverse('posts:post_create'),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(
+                    self.client.get(url), 'name="idempotency_key"'
+                )
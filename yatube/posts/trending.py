@@ -0,0 +1,74 @@
+import math
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post, PostRank
+
+
+def score(recent_comments, followers, age_hours):
+    velocity = recent_comments / settings.TRENDING_WINDOW_HOURS
+    reach = math.log1p(followers)
+    decay = 0.5 ** (age_hours / settings.TRENDING_HALF_LIFE_HOURS)
+    return (
+        settings.TRENDING_COMMENT_WEIGHT * velocity + reach + 1
+    ) * decay
+
+
+def update_ranks(now=None):
+    """Пересчитывает рейтинг постов, активных в скользящем окне."""
+    now = now or timezone.now()
+    since = now - timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    comment_counts = dict(
+        Comment.objects.filter(created__gte=since).order_by().values_list(
+            'post'
+        ).annotate(Count('pk'))
+    )
+    posts = list(
+        Post.objects.filter(
+            Q(pub_date__gte=since) | Q(comments__created__gte=since)
+        ).distinct().order_by().values_list('pk', 'author', 'pub_date')
+    )
+    follower_counts = dict(
+        Follow.objects.filter(
+            author__in={author for _, author, _ in posts}
+        ).order_by().values_list('author').annotate(Count('pk'))
+    )
+    ranks = [
+        PostRank(
+            post_id=pk,
+            score=score(
+                comment_counts.get(pk, 0),
+                follower_counts.get(author, 0),
+                (now - pub_date).total_seconds() / 3600
+            )
+        )
+        for pk, author, pub_date in posts
+    ]
+    with transaction.atomic():
+        PostRank.objects.all().delete()
+        PostRank.objects.bulk_create(ranks)
+    return len(ranks)
+
+
+def top_posts(limit=None):
+    return PostRank.objects.select_related(
+        'post__author', 'post__group'
+    ).defer('post__text', 'post__text_html')[:limit or settings.TRENDING_SIZE]
+
+
+def top_groups(ranks):
+    scores = defaultdict(float)
+    groups = {}
+    for rank in ranks:
+        group = rank.post.group
+        if group is not None:
+            scores[group.pk] += rank.score
+            groups[group.pk] = group
+    return [
+        groups[pk] for pk in sorted(scores, key=scores.get, reverse=True)
+    ]
@@ -6,17 +6,41 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('stream/', views.index_stream, name='index_stream'),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
+    path(
+        'posts/<int:post_id>/stream/',
+        views.post_stream,
+        name='post_stream'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path('groups/', views.group_index, name='group_index'),
+    path('trending/', views.trending_index, name='trending'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/stream/',
+        views.group_stream,
+        name='group_stream'
+    ),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/stream/', views.follow_stream, name='follow_stream'),
+    path(
+        'notifications/',
+        views.notification_list,
+        name='notifications'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,16 +1,34 @@
+from difflib import unified_diff
+from functools import partial
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import (Http404, HttpResponse, JsonResponse,
+                         StreamingHttpResponse)
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_http_methods
+from django.views.decorators.vary import vary_on_cookie
 
+from core.idempotency import idempotent
+from posts import (duplicates, follow_graph, live, notifications,
+                   recommendations, revisions, trending)
 from posts.forms import CommentForm, PostForm
-from posts.models import Follow, Group, Post, User
+from posts.models import (ArchivedPost, ContentSignature, Follow, Group,
+                          Post, User)
+from users.throttling import throttle_user
 
 
 def index(request):
     posts = Post.objects.all()
-    post_list = Post.objects.order_by('-pub_date')
+    post_list = Post.objects.select_related('author', 'group').defer(
+        'text', 'text_html'
+    ).order_by('-pub_date')
     paginator = Paginator(post_list, settings.LIMIT_POST)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -23,7 +41,9 @@ def index(request):
 
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.order_by('-pub_date')
+    posts = group.posts.select_related('author').defer(
+        'text', 'text_html'
+    ).order_by('-pub_date')
     paginator = Paginator(posts, settings.LIMIT_POST)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -35,34 +55,79 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_control(max_age=settings.GROUP_INDEX_MAX_AGE)
+@vary_on_cookie
+def group_index(request):
+    groups = Group.objects.select_related('stats').order_by(
+        F('stats__last_activity').desc(nulls_last=True), 'title'
+    )
+    context = {
+        'groups': groups
+    }
+    return render(request, 'posts/group_index.html', context)
+
+
+def trending_index(request):
+    ranks = list(trending.top_posts())
+    context = {
+        'ranks': ranks,
+        'groups': trending.top_groups(ranks)
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
+    following = False
+    recommended = ()
+    if request.user.is_authenticated:
+        following = follow_graph.is_following(request.user.pk, author.pk)
+        recommended = recommendations.for_user(request.user)
+    posts = Post.objects.including_archive(author=author).select_related(
+        'author', 'group'
+    ).defer('text', 'text_html')
     paginator = Paginator(posts, settings.LIMIT_POST)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
-    post_count = posts.count()
-    following = request.user.is_authenticated and (
-        Follow.objects.filter(user=request.user, author=author).exists()
-    )
     context = {
-        'post_count': post_count,
+        'post_count': paginator.count,
         'posts': posts,
         'author': author,
         'page_obj': page_obj,
-        'following': following
+        'following': following,
+        'recommendations': recommended
     }
     return render(request, 'posts/profile.html', context)
 
 
+def _author_posts(model):
+    return Coalesce(Subquery(
+        model.objects.filter(author=OuterRef('author')).order_by().values(
+            'author'
+        ).annotate(count=Count('pk')).values('count')
+    ), 0)
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    # Столько же постов автора показывает профиль: рабочие и архивные.
+    post_number = _author_posts(Post) + _author_posts(ArchivedPost)
+    try:
+        post = Post.objects.get_with_archive(
+            Post.objects.select_related('author', 'group').annotate(
+                post_number=post_number
+            ),
+            ArchivedPost.objects.select_related('author', 'group').annotate(
+                post_number=post_number
+            ),
+            id=post_id
+        )
+    except ArchivedPost.DoesNotExist:
+        raise Http404
     form = CommentForm()
-    post_number = post.author.posts.count()
-    comments = post.comments.all()
+    comments = post.comments.select_related('author')
     context = {
         'post': post,
-        'post_number': post_number,
+        'post_number': post.post_number,
         'comments': comments,
         'form': form
     }
@@ -70,16 +135,25 @@ def post_detail(request, post_id):
 
 
 @login_required
+@idempotent('post')
+@throttle_user('post')
 def post_create(request):
     groups = Group.objects.all()
     form = PostForm(
         request.POST or None,
         files=request.FILES or None
     )
+    if form.is_valid():
+        content = duplicates.check(
+            ContentSignature.POST, form.cleaned_data['text']
+        )
+        if duplicates.is_rejected(content):
+            form.add_error('text', duplicates.REJECTED)
     if form.is_valid():
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        duplicates.record(content, post.pk, request.user.pk)
         return redirect(reverse('posts:profile',
                                 kwargs={'username': request.user.username}))
     context = {
@@ -95,12 +169,28 @@ def post_edit(request, post_id):
     post = get_object_or_404(Post, id=post_id)
     if request.user != post.author:
         return redirect('posts:index')
+    previous = (post.text, post.image.name or '')
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post)
+    content = None
+    if form.is_valid() and 'text' in form.changed_data:
+        content = duplicates.check(
+            ContentSignature.POST, form.cleaned_data['text'],
+            exclude=post.pk
+        )
+        if duplicates.is_rejected(content):
+            form.add_error('text', duplicates.REJECTED)
     if form.is_valid():
         form.save()
+        if content is not None:
+            duplicates.replace(content, post.pk, request.user.pk)
+        current = (post.text, post.image.name or '')
+        if current != previous:
+            transaction.on_commit(partial(
+                revisions.record, post.pk, request.user.pk, previous, current
+            ))
         return redirect('posts:post_detail', post.id)
 
     context = {
@@ -112,14 +202,63 @@ def post_edit(request, post_id):
 
 
 @login_required
+def post_history(request, post_id):
+    post = get_object_or_404(
+        Post.objects.select_related('author'), id=post_id
+    )
+    if request.user != post.author and not request.user.is_staff:
+        return redirect('posts:post_detail', post.id)
+    paginator = Paginator(
+        post.revisions.select_related('editor').defer('data'), 1
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    revision = text = diff = None
+    if page_obj.object_list:
+        revision = page_obj.object_list[0]
+        text = revisions.text_at(post.pk, revision.number)
+        if revision.number > 1:
+            diff = '\n'.join(unified_diff(
+                revisions.text_at(post.pk, revision.number - 1).splitlines(),
+                text.splitlines(),
+                lineterm=''
+            ))
+    context = {
+        'post': post,
+        'page_obj': page_obj,
+        'revision': revision,
+        'text': text,
+        'diff': diff
+    }
+    return render(request, 'posts/post_history.html', context)
+
+
+@login_required
+@idempotent('comment')
+@throttle_user('comment')
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
     form = CommentForm(request.POST or None)
+    if form.is_valid():
+        content = duplicates.check(
+            ContentSignature.COMMENT, form.cleaned_data['text']
+        )
+        if duplicates.is_rejected(content):
+            form.add_error('text', duplicates.REJECTED)
     if form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
         comment.save()
+        duplicates.record(content, comment.pk, request.user.pk)
+        if request.is_ajax():
+            response = render(
+                request, 'includes/comment.html', {'comment': comment},
+                status=201
+            )
+            response['X-Comment-Id'] = comment.pk
+            return response
+    elif request.is_ajax():
+        return JsonResponse({'errors': form.errors}, status=400)
     return redirect('posts:post_detail', post_id=post_id)
 
 
@@ -127,29 +266,102 @@ def add_comment(request, post_id):
 def follow_index(request):
     authors_posts = Post.objects.filter(
         author__following__user=request.user
-    ).all()
+    ).select_related('author', 'group').defer('text', 'text_html')
     paginator = Paginator(authors_posts, settings.LIMIT_POST)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     context = {
-        'page_obj': page_obj
+        'page_obj': page_obj,
+        'recommendations': recommendations.for_user(request.user)
     }
     return render(request, 'posts/follow.html', context)
 
 
 @login_required
-def profile_follow(request, username):
+def notification_list(request):
+    items = notifications.coalesce(request.user)
+    notifications.mark_read(request.user, items)
+    context = {
+        'notifications': items
+    }
+    return render(request, 'posts/notifications.html', context)
+
+
+def _confirm_follow(request, username, follow):
     author = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=request.user, author=author)
-    if request.user != author and not is_follower.exists():
-        Follow.objects.create(user=request.user, author=author)
-    return redirect(reverse('posts:profile', args=[username]))
+    return render(request, 'posts/follow_confirm.html', {
+        'author': author,
+        'follow': follow
+    })
+
+
+def _follow_response(request, username):
+    if request.method == 'DELETE' or request.is_ajax():
+        return HttpResponse(status=204)
+    return redirect('posts:profile', username=username)
+
+
+def _unfollow(request, username):
+    Follow.objects.filter(
+        user=request.user, author__username=username
+    ).delete()
+    return _follow_response(request, username)
+
+
+@login_required
+@require_http_methods(['GET', 'POST', 'DELETE'])
+@throttle_user('follow', methods=('POST', 'DELETE'))
+def profile_follow(request, username):
+    """POST подписывает, DELETE отписывает; повтор ничего не меняет.
+
+    GET ничего не меняет: старые ссылки, краулеры и предзагрузка
+    получают страницу с формой подтверждения.
+    """
+    if request.method == 'GET':
+        return _confirm_follow(request, username, follow=True)
+    if request.method == 'DELETE':
+        return _unfollow(request, username)
+    author = get_object_or_404(User.objects.only('id'), username=username)
+    if request.user != author:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return _follow_response(request, username)
 
 
 @login_required
+@require_http_methods(['GET', 'POST', 'DELETE'])
+@throttle_user('follow', methods=('POST', 'DELETE'))
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    is_follower = Follow.objects.filter(user=request.user, author=author)
-    if is_follower.exists():
-        is_follower.delete()
-    return redirect('posts:profile', username=author)
+    if request.method == 'GET':
+        return _confirm_follow(request, username, follow=False)
+    return _unfollow(request, username)
+
+
+def _event_stream(channels):
+    response = StreamingHttpResponse(
+        live.stream(channels), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def index_stream(request):
+    return _event_stream({live.index_channel()})
+
+
+def group_stream(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return _event_stream({live.group_channel(group.pk)})
+
+
+def post_stream(request, post_id):
+    post = get_object_or_404(Post.objects.only('id'), id=post_id)
+    return _event_stream({live.post_channel(post.pk)})
+
+
+@login_required
+def follow_stream(request):
+    return _event_stream({
+        live.author_channel(author_id)
+        for author_id in follow_graph.authors(request.user.pk)
+    })
@@ -0,0 +1,32 @@
+import time
+
+from django.contrib.auth.hashers import (check_password, get_hasher,
+                                         make_password)
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Измеряет скорость хеширования и проверки паролей на одно ядро'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--hasher', default='default')
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        hasher = get_hasher(options['hasher'])
+        password = 'benchmark-password'
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            encoded = make_password(password, hasher=hasher)
+        hash_rate = iterations / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            check_password(password, encoded)
+        check_rate = iterations / (time.perf_counter() - started)
+
+        self.stdout.write(f'Алгоритм: {hasher.algorithm}')
+        self.stdout.write(f'Хеширование: {hash_rate:.1f} в секунду на ядро')
+        self.stdout.write(f'Проверка: {check_rate:.1f} в секунду на ядро')
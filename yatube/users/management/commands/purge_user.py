@@ -0,0 +1,28 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from users.services import purge_user
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Удаляет пользователя со всеми постами, комментариями и подписками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--batch-size', type=int)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f'Пользователь {options["username"]} не найден'
+            )
+        deleted = purge_user(user, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено постов: {deleted["posts"]}, '
+            f'комментариев: {deleted["comments"]}, '
+            f'подписок: {deleted["follows"]}'
+        ))
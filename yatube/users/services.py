@@ -0,0 +1,95 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from sorl.thumbnail import delete as delete_thumbnails
+
+from core.batch import delete_in_batches, pk_batches
+from posts import follow_graph, group_stats
+from posts.models import (ArchivedComment, ArchivedPost,
+                          AuthorRecommendation, Comment, ContentSignature,
+                          Follow, NotificationEvent, Post)
+
+
+def _delete_images(names):
+    for name in names:
+        delete_thumbnails(name)
+
+
+def _delete_posts(queryset, batch_size):
+    """Удаляет посты пакетами, а их картинки — после коммита пакета."""
+    model = queryset.model
+    deleted = 0
+    for pks in pk_batches(queryset, batch_size):
+        batch = model.objects.filter(pk__in=pks)
+        images = [
+            name for name in batch.values_list('image', flat=True) if name
+        ]
+        with transaction.atomic():
+            deleted += batch.delete()[1].get(model._meta.label, 0)
+            transaction.on_commit(partial(_delete_images, images))
+    return deleted
+
+
+def purge_user(user, batch_size=None):
+    """Удаляет пользователя и всё, что ему принадлежит, пакетами.
+
+    Сначала удаляются листья (подписи текстов, комментарии, подписки,
+    рекомендации, события уведомлений),
+    затем посты с картинками, рабочие и архивные, и только потом сам
+    пользователь, поэтому каскад последнего удаления почти пуст.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    followers = set(
+        Follow.objects.filter(author=user).values_list('user', flat=True)
+    )
+    posts = Post.objects.filter(author=user)
+    groups = set(
+        posts.order_by().exclude(group=None).values_list(
+            'group', flat=True
+        ).distinct()
+    )
+    delete_in_batches(ContentSignature.objects.filter(
+        Q(author=user) | Q(
+            kind=ContentSignature.COMMENT,
+            object_id__in=Comment.objects.filter(
+                post__author=user
+            ).values('pk')
+        )
+    ), batch_size)
+    deleted = {
+        'comments': sum(
+            delete_in_batches(comments, batch_size)[0] for comments in (
+                Comment.objects.filter(post__author=user),
+                Comment.objects.filter(author=user),
+                ArchivedComment.objects.filter(post__author=user),
+                ArchivedComment.objects.filter(author=user),
+            )
+        ),
+        'follows': delete_in_batches(
+            Follow.objects.filter(user=user), batch_size
+        )[0] + delete_in_batches(
+            Follow.objects.filter(author=user), batch_size
+        )[0],
+    }
+    delete_in_batches(
+        AuthorRecommendation.objects.filter(user=user), batch_size
+    )
+    delete_in_batches(
+        AuthorRecommendation.objects.filter(author=user), batch_size
+    )
+    delete_in_batches(NotificationEvent.objects.filter(
+        Q(actor=user) | Q(recipient=user) | Q(post__author=user)
+        | Q(archived_post__author=user)
+    ), batch_size)
+    with group_stats.deferred():
+        deleted['posts'] = _delete_posts(posts, batch_size)
+    deleted['posts'] += _delete_posts(
+        ArchivedPost.objects.filter(author=user), batch_size
+    )
+    group_stats.rebuild(groups)
+    for follower_id in followers:
+        follow_graph.invalidate(follower_id)
+    user.delete()
+    return deleted
@@ -0,0 +1,318 @@
+import threading
+import time
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import (Client, TestCase, TransactionTestCase,
+                         override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.management.commands.serve import Command as ServeCommand
+from posts import archive
+from posts.models import (ArchivedComment, ArchivedPost, Comment, Follow,
+                          Group, GroupStats, Post, User)
+from users import throttling
+from users.services import purge_user
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(PASSWORD_HASHERS=[
+    'users.hashers.TunedArgon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+])
+class HasherPolicyTests(TestCase):
+    def test_legacy_hash_is_upgraded_on_login(self):
+        user = User.objects.create(
+            username='auth',
+            password=make_password('secret-pass', hasher='pbkdf2_sha256')
+        )
+        self.assertTrue(
+            Client().login(username='auth', password='secret-pass')
+        )
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('argon2$'))
+
+
+@override_settings(THROTTLE_RATES={'login': (2, 60)})
+class ThrottlingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_sliding_window_counts_previous_window(self):
+        self.assertEqual(throttling.hit('login', 'ip', now=50), 0)
+        self.assertEqual(throttling.hit('login', 'ip', now=55), 0)
+        self.assertEqual(throttling.hit('login', 'ip', now=65), 55)
+        self.assertEqual(throttling.hit('login', 'ip', now=175), 0)
+
+    def test_concurrent_hits_are_all_counted(self):
+        results = []
+
+        def hit():
+            results.append(throttling.hit('login', 'ip', now=0))
+
+        threads = [threading.Thread(target=hit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), [0, 0] + [60] * 6)
+
+    @override_settings(THROTTLE_RATES={'signup': (1, 3600)})
+    def test_hits_live_for_two_windows(self):
+        self.assertEqual(throttling.hit('signup', 'ip', now=0), 0)
+        key = cache.make_key(throttling.HIT_KEY.format('signup', 'ip', 0, 1))
+        self.assertGreater(cache._expire_info[key] - time.time(), 3600)
+
+    def test_login_posts_are_rejected_before_authentication(self):
+        data = {'username': 'nobody', 'password': 'wrong'}
+        for _ in range(2):
+            response = self.guest_client.post(reverse('users:login'), data)
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.guest_client.post(reverse('users:login'), data)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        response = self.guest_client.get(reverse('users:login'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    @override_settings(
+        CLIENT_IP_HEADER='HTTP_X_FORWARDED_FOR', TRUSTED_PROXY_COUNT=1
+    )
+    def test_clients_behind_proxy_have_own_limits(self):
+        data = {'username': 'nobody', 'password': 'wrong'}
+        url = reverse('users:login')
+        for _ in range(2):
+            self.guest_client.post(
+                url, data, HTTP_X_FORWARDED_FOR='6.6.6.6, 10.0.0.1'
+            )
+        response = self.guest_client.post(
+            url, data, HTTP_X_FORWARDED_FOR='10.0.0.1'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        response = self.guest_client.post(
+            url, data, HTTP_X_FORWARDED_FOR='10.0.0.2'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+@override_settings(THROTTLE_RATES={'post': (2, 60), 'follow': (2, 60)})
+class UserThrottlingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_token_bucket_refills_over_time(self):
+        self.assertEqual(throttling.take('post', 1, now=0), 0)
+        self.assertEqual(throttling.take('post', 1, now=0), 0)
+        self.assertEqual(throttling.take('post', 1, now=15), 15)
+        self.assertEqual(throttling.take('post', 2, now=15), 0)
+        self.assertEqual(throttling.take('post', 1, now=30), 0)
+        self.assertEqual(throttling.take('post', 1, now=30), 30)
+        self.assertEqual(throttling.take('post', 1, now=500), 0)
+        self.assertEqual(throttling.take('post', 1, now=500), 0)
+        self.assertEqual(throttling.take('post', 1, now=500), 10)
+
+    def test_concurrent_takes_share_the_bucket(self):
+        results = []
+
+        def take():
+            results.append(throttling.take('post', 1, now=0))
+
+        threads = [threading.Thread(target=take) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(results), [0, 0] + [30] * 6)
+
+    def test_writes_are_rejected_before_view(self):
+        url = reverse('posts:post_create')
+        for text in ('Первый пост', 'Второй пост'):
+            response = self.authorized_client.post(url, {'text': text})
+            self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        response = self.authorized_client.post(url, {'text': 'Третий'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Post.objects.filter(author=self.user).count(), 2)
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_follow_churn_is_limited_without_queries(self):
+        follow = reverse('posts:profile_follow', args=['author'])
+        unfollow = reverse('posts:profile_unfollow', args=['author'])
+        self.authorized_client.post(follow)
+        self.authorized_client.post(unfollow)
+        self.authorized_client.get(reverse('posts:notifications'))
+        with self.assertNumQueries(0):
+            response = self.authorized_client.post(follow)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        response = self.authorized_client.get(follow)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+
+class CachedSessionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_repeat_requests_skip_session_and_user_queries(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with self.assertNumQueries(0):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'test_cache',
+    }})
+    def test_serve_refuses_caches_that_cost_queries(self):
+        call_command('createcachetable', verbosity=0)
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        with CaptureQueriesContext(connection) as context:
+            self.authorized_client.get(url)
+        self.assertTrue(context.captured_queries)
+        with self.assertRaises(CommandError):
+            ServeCommand().check_cache()
+
+    def test_user_save_invalidates_cached_user(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Лев'
+        user.save()
+        response = self.authorized_client.get(url)
+        self.assertEqual(response.context['user'].first_name, 'Лев')
+
+    def test_deactivation_logs_out_cached_user(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+        cache.set('user:{}'.format(user.pk), user)
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_password_change_logs_out_cached_user(self):
+        url = reverse('about:author')
+        self.authorized_client.get(url)
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('new-secret')
+        User.objects.filter(pk=user.pk).update(password=user.password)
+        cache.set('user:{}'.format(user.pk), user)
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_prune_sessions_removes_only_expired(self):
+        Session.objects.create(
+            session_key='expired',
+            session_data='',
+            expire_date=timezone.now() - timedelta(days=1)
+        )
+        call_command('prune_sessions', batch_size=1, stdout=StringIO())
+        self.assertFalse(Session.objects.filter(pk='expired').exists())
+        self.assertEqual(Session.objects.count(), 1)
+
+
+class PurgeUserTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='spammer')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.posts = [
+            Post.objects.create(
+                author=self.user,
+                text='Текст' + str(i),
+                group=self.group,
+                image=SimpleUploadedFile(
+                    name=f'small{i}.gif',
+                    content=SMALL_GIF,
+                    content_type='image/gif'
+                )
+            )
+            for i in range(3)
+        ]
+        self.reader_post = Post.objects.create(
+            author=self.reader, text='Текст', group=self.group
+        )
+        Comment.objects.create(
+            post=self.posts[0], author=self.reader, text='Комментарий'
+        )
+        Comment.objects.create(
+            post=self.reader_post, author=self.user, text='Спам'
+        )
+        Follow.objects.create(user=self.user, author=self.reader)
+        Follow.objects.create(user=self.reader, author=self.user)
+
+    def test_purge_user_removes_everything_in_batches(self):
+        images = [post.image.name for post in self.posts]
+        deleted = purge_user(self.user, batch_size=2)
+        self.assertEqual(
+            deleted, {'comments': 2, 'follows': 2, 'posts': 3}
+        )
+        self.assertFalse(User.objects.filter(username='spammer').exists())
+        self.assertEqual(list(Post.objects.all()), [self.reader_post])
+        self.assertFalse(Comment.objects.exists())
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 1
+        )
+        for name in images:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_purge_user_removes_archived_posts(self):
+        images = [post.image.name for post in self.posts]
+        archive.archive_before(timezone.now() + timedelta(days=1))
+        deleted = purge_user(self.user, batch_size=2)
+        self.assertEqual(deleted['posts'], 3)
+        self.assertEqual(deleted['comments'], 2)
+        self.assertEqual(
+            list(ArchivedPost.objects.values_list('author', flat=True)),
+            [self.reader.pk]
+        )
+        self.assertFalse(ArchivedComment.objects.exists())
+        for name in images:
+            self.assertFalse(default_storage.exists(name))
+
+    def test_purge_user_command(self):
+        out = StringIO()
+        call_command('purge_user', 'spammer', stdout=out)
+        self.assertIn('Удалено постов: 3', out.getvalue())
+        self.assertFalse(User.objects.filter(username='spammer').exists())
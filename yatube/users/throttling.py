@@ -0,0 +1,138 @@
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import render
+
+HIT_KEY = 'throttle:hit:{}:{}:{}:{}'
+COUNT_KEY = 'throttle:count:{}:{}:{}'
+SLOT_KEY = 'throttle:slot:{}:{}:{}'
+CURSOR_KEY = 'throttle:cursor:{}:{}'
+
+
+def _hits(scope, ident, window, limit):
+    return len(cache.get_many([
+        HIT_KEY.format(scope, ident, window, number)
+        for number in range(1, limit + 2)
+    ]))
+
+
+def hit(scope, ident, now=None):
+    """Учитывает попытку в скользящем окне.
+
+    Попытка — ключ кэша с её номером в окне, созданный через
+    cache.add, как токены в take: счёт атомарен и ключи живут два
+    окна в любом бэкенде. Больше limit + 1 попыток не считается, всё
+    сверх лимита и так отклоняется. Возвращает 0, если попытка
+    разрешена, иначе количество секунд до следующей разрешённой
+    попытки.
+    """
+    limit, period = settings.THROTTLE_RATES[scope]
+    now = time.time() if now is None else now
+    window, offset = divmod(now, period)
+    window = int(window)
+    count_key = COUNT_KEY.format(scope, ident, window)
+    current = limit + 1
+    for number in range(cache.get(count_key, 1), limit + 2):
+        if cache.add(
+            HIT_KEY.format(scope, ident, window, number), 1, period * 2
+        ):
+            cache.set(count_key, number + 1, period * 2)
+            current = number
+            break
+    previous = _hits(scope, ident, window - 1, limit)
+    estimated = previous * (1 - offset / period) + current
+    if estimated <= limit:
+        return 0
+    return math.ceil(period - offset)
+
+
+def take(scope, ident, now=None):
+    """Берёт токен из корзины scope для ident.
+
+    Корзина вмещает limit токенов и получает новый токен каждые
+    period / limit секунд. Токен — ключ кэша с номером интервала, в
+    котором он появился, и взять его значит создать ключ через
+    cache.add: он атомарен во всех бэкендах кэша, поэтому блокировки
+    не нужны. Доступны токены limit последних интервалов. Курсор
+    только подсказывает, с какого токена начинать поиск. Возвращает 0,
+    если токен взят, иначе количество секунд до следующего токена.
+    """
+    limit, period = settings.THROTTLE_RATES[scope]
+    interval = period / limit
+    now = time.time() if now is None else now
+    current = math.floor(now / interval)
+    oldest = current - limit + 1
+    cursor_key = CURSOR_KEY.format(scope, ident)
+    for slot in range(max(cache.get(cursor_key, oldest), oldest), current + 1):
+        if cache.add(
+            SLOT_KEY.format(scope, ident, slot), 1,
+            math.ceil(period + interval)
+        ):
+            cache.set(cursor_key, slot + 1, period)
+            return 0
+    return math.ceil((current + 1) * interval - now)
+
+
+def client_ip(request):
+    """Адрес клиента с учётом доверенных прокси.
+
+    За обратным прокси REMOTE_ADDR — адрес самого прокси. Тогда адрес
+    берётся из заголовка CLIENT_IP_HEADER (обычно X-Forwarded-For):
+    TRUSTED_PROXY_COUNT-й адрес с конца добавлен последним доверенным
+    прокси, а всё левее него клиент мог подделать.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    if not settings.CLIENT_IP_HEADER:
+        return remote_addr
+    addresses = [
+        address.strip()
+        for address in request.META.get(
+            settings.CLIENT_IP_HEADER, ''
+        ).split(',')
+        if address.strip()
+    ]
+    if len(addresses) < settings.TRUSTED_PROXY_COUNT:
+        return remote_addr
+    return addresses[-settings.TRUSTED_PROXY_COUNT]
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after}, status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def throttle(scope):
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method == 'POST':
+                retry_after = hit(scope, client_ip(request))
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def throttle_user(scope, methods=('POST',)):
+    """Ограничивает запись для вошедшего пользователя.
+
+    Ставится под login_required. Отказ возвращается до вызова view,
+    то есть до запросов к базе.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in methods:
+                retry_after = take(scope, request.user.pk)
+                if retry_after:
+                    return too_many_requests(request, retry_after)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -8,6 +8,7 @@ from django.contrib.auth.views import (LoginView, LogoutView,
 from django.urls import path
 
 from . import views
+from .throttling import throttle
 
 app_name = 'users'
 
@@ -21,14 +22,14 @@ urlpatterns = [
     ),
     path(
         'signup/',
-        views.SignUp.as_view(),
+        throttle('signup')(views.SignUp.as_view()),
         name='signup'
     ),
     path(
         'login/',
-        LoginView.as_view(
+        throttle('login')(LoginView.as_view(
             template_name='users/login.html'
-        ),
+        )),
         name='login'
     ),
     path(
@@ -47,9 +48,9 @@ urlpatterns = [
     ),
     path(
         'password_reset/',
-        PasswordResetView.as_view(
+        throttle('password_reset')(PasswordResetView.as_view(
             template_name='users/password_reset_form.html'
-        ),
+        )),
         name='password_reset'
     ),
     path(
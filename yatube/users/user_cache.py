@@ -0,0 +1,51 @@
+"""Кэш пользователя для запросов с сессией.
+
+Объект пользователя лежит в общем кэше (CACHES), а не в памяти
+процесса, поэтому сброс по сигналу при сохранении или удалении
+пользователя сразу видят все процессы serve. Изменения в обход
+сигналов (QuerySet.update) нужно сопровождать вызовом invalidate.
+
+Запросы к базе экономятся, только если кэш в памяти: с DatabaseCache
+сессия и пользователь читались бы из таблицы кэша, поэтому serve
+такой кэш не принимает.
+"""
+from django.conf import settings
+from django.contrib import auth
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.crypto import constant_time_compare
+
+USER_KEY = 'user:{}'
+
+
+def invalidate(user_id):
+    cache.delete(USER_KEY.format(user_id))
+
+
+def get_user(request):
+    if not hasattr(request, '_cached_user'):
+        request._cached_user = _load_user(request)
+    return request._cached_user
+
+
+def _load_user(request):
+    try:
+        user_id = auth._get_user_session_key(request)
+        backend_path = request.session[auth.BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+    if backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return AnonymousUser()
+    key = USER_KEY.format(user_id)
+    user = cache.get(key)
+    if user is None:
+        user = auth.get_user(request)
+        if user.is_authenticated:
+            cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
+    session_hash = request.session.get(auth.HASH_SESSION_KEY)
+    if not user.is_active or not (session_hash and constant_time_compare(
+            session_hash, user.get_session_auth_hash())):
+        request.session.flush()
+        return AnonymousUser()
+    return user
@@ -16,7 +16,7 @@ ALLOWED_HOSTS = [
 
 INSTALLED_APPS = [
     'django.contrib.auth',
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
@@ -33,7 +33,7 @@ MIDDLEWARE = [
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'users.middleware.CachedAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -53,6 +53,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'posts.context_processors.notifications',
             ],
         },
     },
@@ -68,6 +69,26 @@ DATABASES = {
 }
 
 
+PASSWORD_HASHER_POLICY = os.getenv('PASSWORD_HASHER_POLICY', 'argon2')
+
+PASSWORD_HASHER_CHOICES = {
+    'argon2': 'users.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'users.hashers.TunedBCryptSHA256PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER_POLICY]] + [
+    hasher for policy, hasher in PASSWORD_HASHER_CHOICES.items()
+    if policy != PASSWORD_HASHER_POLICY
+] + [
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+ARGON2_TIME_COST = int(os.getenv('ARGON2_TIME_COST', 2))
+ARGON2_MEMORY_COST = int(os.getenv('ARGON2_MEMORY_COST', 512))
+ARGON2_PARALLELISM = int(os.getenv('ARGON2_PARALLELISM', 1))
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -83,12 +104,47 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Кэш общий для всех процессов serve: на нём держатся сессии, кэш
+# пользователей, версии графа подписок и счётчиков уведомлений,
+# ограничения частоты запросов, ключи идемпотентности и CacheBroker.
+# Обращения к нему стоят на пути каждого запроса, поэтому serve
+# требует memcached или redis и не запускается с кэшем в памяти
+# процесса, в файлах или в таблице базы данных:
+# CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache
+# CACHE_LOCATION=127.0.0.1:11211
+# LocMemCache по умолчанию годится только для runserver.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
     }
 }
 
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
+USER_CACHE_TIMEOUT = 300
+
+# За обратным прокси: CLIENT_IP_HEADER=HTTP_X_FORWARDED_FOR и число
+# прокси перед приложением.
+CLIENT_IP_HEADER = os.getenv('CLIENT_IP_HEADER', '')
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', 1))
+FOLLOW_GRAPH_SIZE = 10000
+FOLLOW_GRAPH_VERSION_TTL = 2
+
+IDEMPOTENCY_TTL = 10 * 60
+IDEMPOTENCY_WAIT = 5
+
+THROTTLE_RATES = {
+    'login': (10, 60),
+    'signup': (5, 3600),
+    'password_reset': (5, 3600),
+    'post': (20, 3600),
+    'comment': (30, 600),
+    'follow': (60, 3600),
+}
+
 
 LANGUAGE_CODE = 'ru'
 
@@ -104,7 +160,60 @@ STATIC_URL = '/static/'
 
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+if not DEBUG:
+    STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
 LIMIT_POST = 10
+GROUP_INDEX_MAX_AGE = 60
+ADMIN_COUNT_ESTIMATE_THRESHOLD = 10000
+ADMIN_BATCH_SIZE = 500
+PURGE_BATCH_SIZE = 500
+TRENDING_SIZE = 10
+TRENDING_WINDOW_HOURS = 48
+TRENDING_HALF_LIFE_HOURS = 12
+TRENDING_COMMENT_WEIGHT = 3
+RECOMMENDATIONS_SIZE = 10
+RECOMMENDATIONS_SHOWN = 5
+RECOMMENDATIONS_BATCH = 200
+RECOMMENDATIONS_MAX_FOLLOWING = 30
+RECOMMENDATIONS_MAX_NEIGHBOURS = 20
+# serve запускает несколько процессов, и события должны доходить до
+# потоков в каждом из них.
+LIVE_BROKER = os.getenv('LIVE_BROKER', 'posts.live.CacheBroker')
+LIVE_HEARTBEAT = 15
+LIVE_MAX_DURATION = 300
+LIVE_RETRY_MS = 3000
+LIVE_QUEUE_SIZE = 100
+LIVE_EVENT_TTL = 60
+LIVE_POLL_INTERVAL = 1
+NOTIFICATIONS_SIZE = 20
+NOTIFICATIONS_WINDOW_DAYS = 14
+NOTIFICATIONS_CACHE_TTL = 24 * 60 * 60
+NOTIFICATIONS_DIGEST_BATCH = 200
+REVISIONS_SNAPSHOT_EVERY = 10
+ARCHIVE_AFTER_DAYS = 730
+ARCHIVE_BATCH_SIZE = 500
+TEXT_COMPRESSION_THRESHOLD = 256
+EXCERPT_WORDS = 30
+DUPLICATE_ACTION = 'reject'
+DUPLICATE_THRESHOLD = 0.8
+DUPLICATE_WINDOW_HOURS = 24
+DUPLICATE_MIN_WORDS = 8
+PERF_BUDGET_TOLERANCE = float(os.getenv('PERF_BUDGET_TOLERANCE', 0.2))
+PERF_REPORT_PATH = os.getenv('PERF_REPORT_PATH')
+WSGI_WARMUP = os.getenv('WSGI_WARMUP', '1') == '1'
+SERVE_BIND = os.getenv('SERVE_BIND', '127.0.0.1:8000')
+SERVE_WORKERS = int(os.getenv('SERVE_WORKERS', os.cpu_count() * 2 + 1))
+SERVE_THREADS = int(os.getenv('SERVE_THREADS', 8))
+# Открытый SSE-поток в gevent-воркере — гринлет на несколько КБ, а не
+# поток: тысячи ждущих соединений не занимают воркеры.
+SERVE_WORKER_CLASS = os.getenv('SERVE_WORKER_CLASS', 'gevent')
+SERVE_WORKER_CONNECTIONS = int(os.getenv('SERVE_WORKER_CONNECTIONS', 1000))
+SERVE_MAX_REQUESTS = int(os.getenv('SERVE_MAX_REQUESTS', 1000))
+SERVE_MAX_REQUESTS_JITTER = int(os.getenv('SERVE_MAX_REQUESTS_JITTER', 100))
+SERVE_TIMEOUT = int(os.getenv('SERVE_TIMEOUT', LIVE_MAX_DURATION + 30))
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
@@ -0,0 +1,33 @@
+from .settings import *  # noqa: F401,F403
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+DEFAULT_FILE_STORAGE = 'core.storage.InMemoryStorage'
+THUMBNAIL_STORAGE = DEFAULT_FILE_STORAGE
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Потоки и публикация в тестах идут в одном процессе.
+LIVE_BROKER = 'posts.live.LocalBroker'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# Тесты пишут от одних и тех же пользователей в общий кэш; запись
+# ограничивают только тесты самих ограничений.
+THROTTLE_RATES = {
+    **THROTTLE_RATES,  # noqa: F405
+    'post': (10000, 60),
+    'comment': (10000, 60),
+    'follow': (10000, 60),
+}
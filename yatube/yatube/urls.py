@@ -3,12 +3,19 @@ from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import include, path
 
+from core.views import health
+
+# Админка подключена через SimpleAdminConfig: модули admin.py
+# импортируются вместе с URLconf, а не при каждом django.setup().
+admin.autodiscover()
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
     path('admin/', admin.site.urls),
     path('auth/', include('users.urls', namespace='users')),
     path('auth/', include('django.contrib.auth.urls')),
     path('about/', include('about.urls', namespace='about')),
+    path('health/', health, name='health'),
 ]
 if settings.DEBUG:
     urlpatterns += static(
@@ -1,7 +1,16 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
+from core import startup
+from core.static import StaticFilesApplication
+
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
-application = get_wsgi_application()
+application = StaticFilesApplication(
+    get_wsgi_application(), settings.STATIC_ROOT, settings.STATIC_URL
+)
+
+if settings.WSGI_WARMUP:
+    startup.warm()